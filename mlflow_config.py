@@ -1,19 +1,29 @@
 """MLflow configuration"""
 
-import mlflow
-import os
-from dotenv import load_dotenv
+import logging
 
-load_dotenv()
+from src.config import get_config
 
-# Set MLflow tracking URI
-MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "./mlruns")
-mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+logger = logging.getLogger(__name__)
 
-# Set experiment
-EXPERIMENT_NAME = os.getenv("MLFLOW_EXPERIMENT_NAME", "investment_assistant")
-mlflow.set_experiment(EXPERIMENT_NAME)
+# Plain constants; importing this module does not touch mlflow
+MLFLOW_TRACKING_URI = get_config().mlflow_uri
+EXPERIMENT_NAME = get_config().experiment
 
-print(f"MLflow tracking URI: {MLFLOW_TRACKING_URI}")
-print(f"MLflow experiment: {EXPERIMENT_NAME}")
+_configured = False
 
+
+def configure_mlflow():
+    """Set the MLflow tracking URI and experiment (once per process)"""
+    global _configured
+    if _configured:
+        return
+    
+    import mlflow
+    
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    mlflow.set_experiment(EXPERIMENT_NAME)
+    _configured = True
+    
+    logger.info(f"MLflow tracking URI: {MLFLOW_TRACKING_URI}")
+    logger.info(f"MLflow experiment: {EXPERIMENT_NAME}")
@@ -1,17 +1,16 @@
 """Script to initialize the knowledge base"""
 
 import sys
-import os
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.rag.vector_store import VectorStore
 from src.rag.knowledge_base import initialize_knowledge_base
-from dotenv import load_dotenv
+from src.config import get_config
 import logging
 
-load_dotenv()
+CFG = get_config()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,11 +19,11 @@ logger = logging.getLogger(__name__)
 def main():
     """Initialize knowledge base"""
     try:
-        chroma_db_path = os.getenv("CHROMA_DB_PATH", "./data/chroma_db")
+        chroma_db_path = CFG.chroma_path
         
         logger.info(f"Initializing knowledge base at {chroma_db_path}")
         
-        vector_store = VectorStore(chroma_db_path=chroma_db_path)
+        vector_store = VectorStore.get_or_create(chroma_db_path=chroma_db_path)
         initialize_knowledge_base(vector_store)
         
         logger.info("Knowledge base initialized successfully")
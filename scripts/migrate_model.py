@@ -0,0 +1,49 @@
+"""Retrain the strategy model if the saved file holds a legacy estimator"""
+
+import sys
+import logging
+from pathlib import Path
+
+import joblib
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sklearn.ensemble import HistGradientBoostingClassifier
+from src.config import get_config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def needs_migration(model_path: str) -> bool:
+    """
+    Check whether the saved model predates the gradient-boosting estimator
+
+    Args:
+        model_path: Path to the joblib model file
+
+    Returns:
+        True if the file is missing or holds another estimator type
+    """
+    if not Path(model_path).is_file():
+        return True
+    return not isinstance(joblib.load(model_path), HistGradientBoostingClassifier)
+
+
+def main():
+    """Retrain and overwrite the saved model when needed"""
+    model_path = get_config().model_path
+
+    if not needs_migration(model_path):
+        logger.info(f"{model_path} already uses HistGradientBoostingClassifier")
+        return
+
+    from scripts.train_model import main as train_main
+
+    logger.info(f"Retraining {model_path} with HistGradientBoostingClassifier...")
+    train_main()
+
+
+if __name__ == "__main__":
+    main()
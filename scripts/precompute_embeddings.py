@@ -0,0 +1,48 @@
+"""Script to precompute embeddings of the default knowledge base"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.rag.vector_store import VectorStore
+from src.rag.knowledge_base import (
+    DEFAULT_EMBEDDINGS_PATH,
+    FINANCIAL_KNOWLEDGE,
+    embedding_key,
+    save_embeddings,
+)
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Embed FINANCIAL_KNOWLEDGE and write the vectors shipped with src/rag"""
+    try:
+        # Only the embeddings client is used; the Chroma collection is never opened
+        vector_store = VectorStore.get_or_create()
+        texts = [entry.content for entry in FINANCIAL_KNOWLEDGE]
+
+        logger.info(
+            f"Embedding {len(texts)} default documents with {vector_store.embedding_model}"
+        )
+        vectors = vector_store.embeddings.embed_documents(texts)
+
+        save_embeddings(
+            DEFAULT_EMBEDDINGS_PATH,
+            {
+                embedding_key(vector_store.embedding_model, text): vector
+                for text, vector in zip(texts, vectors)
+            },
+        )
+        logger.info(f"Wrote {DEFAULT_EMBEDDINGS_PATH}")
+
+    except Exception as e:
+        logger.error(f"Error precomputing embeddings: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
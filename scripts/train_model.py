@@ -4,6 +4,7 @@ import sys
 import os
 import pandas as pd
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 # Add parent directory to path
@@ -12,11 +13,10 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.models.random_forest_model import RandomForestStrategyModel
 from src.data_ingestion.coingecko_client import CoinGeckoClient
 from src.data_ingestion.alpha_vantage_client import AlphaVantageClient
-from src.data_ingestion.technical_indicators import enrich_with_indicators
-from dotenv import load_dotenv
-import mlflow
+from src.data_ingestion.technical_indicators import enrich_many
+from src.config import get_config
 
-load_dotenv()
+CFG = get_config()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,39 +27,44 @@ def collect_training_data():
     logger.info("Collecting training data...")
     
     coingecko = CoinGeckoClient()
-    alpha_vantage = AlphaVantageClient(api_key=os.getenv("ALPHA_VANTAGE_API_KEY", ""))
+    alpha_vantage = AlphaVantageClient(api_key=CFG.alpha_key)
     
-    all_data = []
-    
-    # Collect crypto data
     crypto_symbols = ["bitcoin", "ethereum"]
-    for symbol in crypto_symbols:
-        try:
-            df = coingecko.get_price_history(symbol, days=90)
-            df = enrich_with_indicators(df)
-            df["symbol"] = symbol
-            all_data.append(df)
-            logger.info(f"Collected {len(df)} rows for {symbol}")
-        except Exception as e:
-            logger.warning(f"Error collecting data for {symbol}: {e}")
-    
-    # Collect ETF data
     etf_symbols = ["SPY", "QQQ"]
-    for symbol in etf_symbols:
-        try:
-            df = alpha_vantage.get_time_series_daily(symbol, outputsize="compact")
-            df = enrich_with_indicators(df)
-            df["symbol"] = symbol
-            all_data.append(df)
-            logger.info(f"Collected {len(df)} rows for {symbol}")
-        except Exception as e:
-            logger.warning(f"Error collecting data for {symbol}: {e}")
     
-    if not all_data:
+    tasks = [
+        (coingecko.get_price_history, symbol, {"days": 90}) for symbol in crypto_symbols
+    ] + [
+        (alpha_vantage.get_time_series_daily, symbol, {"outputsize": "compact"}) for symbol in etf_symbols
+    ]
+    
+    # Each fetch is network-bound, so run them concurrently; enrichment happens
+    # afterwards, one thread per symbol group
+    raw_frames = []
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        futures = {
+            executor.submit(fetch_fn, symbol, **kwargs): symbol
+            for fetch_fn, symbol, kwargs in tasks
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                df = future.result()
+                raw_frames.append(df.assign(symbol=symbol))
+                logger.info(f"Collected {len(df)} rows for {symbol}")
+            except Exception as e:
+                logger.warning(f"Error collecting data for {symbol}: {e}")
+    
+    if not raw_frames:
         raise ValueError("No training data collected")
     
-    # Combine all data
-    combined_df = pd.concat(all_data, ignore_index=True)
+    # Sources have different columns (CoinGecko has no OHLC), so drop the
+    # all-NaN ones per symbol before computing indicators
+    raw = pd.concat(raw_frames, ignore_index=True)
+    combined_df = pd.concat(
+        enrich_many([group.dropna(axis=1, how="all") for _, group in raw.groupby("symbol", sort=False)]),
+        ignore_index=True
+    )
     logger.info(f"Total training data: {len(combined_df)} rows")
     
     return combined_df
@@ -68,9 +73,7 @@ def collect_training_data():
 def main():
     """Main training function"""
     try:
-        # Initialize MLflow
-        from mlflow_config import EXPERIMENT_NAME
-        mlflow.set_experiment(EXPERIMENT_NAME)
+        from mlflow_config import EXPERIMENT_NAME, configure_mlflow
         
         # Collect data
         df = collect_training_data()
@@ -79,6 +82,7 @@ def main():
         model = RandomForestStrategyModel()
         
         logger.info("Training model...")
+        configure_mlflow()
         accuracy, report = model.train(
             df=df,
             test_size=0.2,
@@ -88,12 +92,22 @@ def main():
         logger.info(f"Training completed. Accuracy: {accuracy:.4f}")
         
         # Save model
-        model_path = os.getenv("MODEL_PATH", "./models/random_forest_model.pkl")
+        model_path = CFG.model_path
         os.makedirs(os.path.dirname(model_path), exist_ok=True)
         model.save(model_path)
         
         logger.info(f"Model saved to {model_path}")
         
+        # ONNX sibling is picked up by load() for faster inference
+        onnx_path = os.path.splitext(model_path)[0] + ".onnx"
+        try:
+            model.save_onnx(onnx_path)
+        except Exception as e:
+            logger.warning(f"Skipping ONNX export: {e}")
+            # Never leave an ONNX file from a previous model next to the new one
+            if os.path.exists(onnx_path):
+                os.remove(onnx_path)
+        
     except Exception as e:
         logger.error(f"Error in training: {e}")
         raise
@@ -2,34 +2,34 @@
 
 import sys
 import os
+import importlib.util
 from pathlib import Path
 
-def check_file_exists(filepath: str, description: str) -> bool:
-    """Check if a file exists"""
-    exists = os.path.exists(filepath)
+def check_file_exists(filepath: str, description: str, root_entries: set) -> bool:
+    """Check if a file exists (top-level names are looked up in root_entries)"""
+    if os.sep in filepath or "/" in filepath:
+        exists = Path(filepath).is_file()
+    else:
+        exists = filepath in root_entries
     status = "✓" if exists else "✗"
     print(f"{status} {description}: {filepath}")
     return exists
 
-def check_env_var(var_name: str) -> bool:
-    """Check if environment variable is set"""
-    from dotenv import load_dotenv
-    load_dotenv()
-    value = os.getenv(var_name)
-    is_set = value is not None and value != ""
+def check_env_var(var_name: str, env: dict) -> bool:
+    """Check if environment variable is set in the given environment snapshot"""
+    is_set = bool(env.get(var_name))
     status = "✓" if is_set else "✗"
     print(f"{status} {var_name}: {'Set' if is_set else 'Not set'}")
     return is_set
 
 def check_import(module_name: str) -> bool:
-    """Check if a Python module can be imported"""
+    """Check if a Python module can be imported (resolved without executing it)"""
     try:
-        __import__(module_name)
-        print(f"✓ {module_name}: Importable")
-        return True
-    except ImportError as e:
-        print(f"✗ {module_name}: {e}")
-        return False
+        ok = importlib.util.find_spec(module_name) is not None
+    except ImportError:
+        ok = False
+    print(f"{'✓' if ok else '✗'} {module_name}: {'Importable' if ok else 'Not found'}")
+    return ok
 
 def main():
     """Main verification function"""
@@ -41,18 +41,27 @@ def main():
     
     # Check project structure
     print("\n📁 Estructura del proyecto:")
-    all_ok &= check_file_exists("requirements.txt", "requirements.txt")
-    all_ok &= check_file_exists(".env", "Archivo .env")
-    all_ok &= check_file_exists("docker-compose.yml", "docker-compose.yml")
-    all_ok &= check_file_exists("src/api/main.py", "API FastAPI")
-    all_ok &= check_file_exists("src/app/main.py", "App Streamlit")
-    all_ok &= check_file_exists("src/models/investment_agent.py", "Agente LangGraph")
-    all_ok &= check_file_exists("src/rag/vector_store.py", "Vector Store")
+    required_files = [
+        ("requirements.txt", "requirements.txt"),
+        (".env", "Archivo .env"),
+        ("docker-compose.yml", "docker-compose.yml"),
+        ("src/api/main.py", "API FastAPI"),
+        ("src/app/main.py", "App Streamlit"),
+        ("src/models/investment_agent.py", "Agente LangGraph"),
+        ("src/rag/vector_store.py", "Vector Store"),
+    ]
+    # One directory listing covers every top-level file
+    root_entries = {entry.name for entry in os.scandir(".")}
+    for filepath, description in required_files:
+        all_ok &= check_file_exists(filepath, description, root_entries)
     
-    # Check environment variables
+    # Check environment variables (load .env once, then read a single snapshot)
     print("\n🔐 Variables de entorno:")
-    all_ok &= check_env_var("GOOGLE_AI_API_KEY")
-    all_ok &= check_env_var("ALPHA_VANTAGE_API_KEY")
+    from dotenv import load_dotenv
+    load_dotenv()
+    env = dict(os.environ)
+    for var_name in ("GOOGLE_AI_API_KEY", "ALPHA_VANTAGE_API_KEY"):
+        all_ok &= check_env_var(var_name, env)
     
     # Check Python dependencies
     print("\n📦 Dependencias Python:")
@@ -1,99 +1,208 @@
 """FastAPI main application"""
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
+from typing import Optional, Dict, Any, Tuple, TYPE_CHECKING
+from dataclasses import dataclass, field
+from collections import OrderedDict
+import asyncio
 import logging
+import orjson
+import time
 from contextlib import asynccontextmanager
-
-from src.models.investment_agent import InvestmentAgent
-from src.models.agent_tools import AgentTools
-from src.data_ingestion.coingecko_client import CoinGeckoClient
-from src.data_ingestion.alpha_vantage_client import AlphaVantageClient
-from src.rag.vector_store import VectorStore
-from src.models.random_forest_model import RandomForestStrategyModel
-from src.rag.knowledge_base import initialize_knowledge_base
-from src.portfolio.portfolio_manager import PortfolioManager
-from src.data_ingestion.news_client import NewsClient
-from src.drift.drift_detector import DriftDetector
-from langchain_google_genai import ChatGoogleGenerativeAI
 import os
-from dotenv import load_dotenv
+from src.config import get_config
+
+# Heavy service modules (langchain, chromadb, sklearn, scipy) are imported
+# where they are first used so worker boot only pays for fastapi + pydantic
+if TYPE_CHECKING:
+    from src.models.investment_agent import InvestmentAgent
+    from src.rag.vector_store import VectorStore
+    from src.portfolio.portfolio_manager import PortfolioManager
+    from src.data_ingestion.news_client import NewsClient
+    from src.drift.drift_detector import DriftDetector
 
-load_dotenv()
+CFG = get_config()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-# Global variables for services
-# Global variables for services
-agent: Optional[InvestmentAgent] = None
-vector_store: Optional[VectorStore] = None
-portfolio_manager: Optional[PortfolioManager] = None
-drift_detector: Optional[DriftDetector] = None
-news_client: Optional[NewsClient] = None
+@dataclass
+class Services:
+    """Process-wide service container, populated lazily on first use"""
+    agent: Optional["InvestmentAgent"] = None
+    vector_store: Optional["VectorStore"] = None
+    portfolio_manager: Optional["PortfolioManager"] = None
+    drift_detector: Optional["DriftDetector"] = None
+    news_client: Optional["NewsClient"] = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    kb_ready: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+services = Services()
+
+# Stale-while-revalidate cache for /v1/market/price, keyed on (symbol, days)
+MARKET_FRESH_TTL = 30.0
+MARKET_CACHE_SIZE = 256
+_market_cache: "OrderedDict[Tuple[str, int], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_market_locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+_background_tasks: set = set()
+
+
+def _build_agent() -> "InvestmentAgent":
+    """Construct the LLM, data clients and ML model, then wire the agent"""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from src.models.investment_agent import InvestmentAgent
+    from src.models.agent_tools import AgentTools
+    from src.models.random_forest_model import RandomForestStrategyModel, PredictionBatcher
+    from src.data_ingestion.coingecko_client import CoinGeckoClient
+    from src.data_ingestion.alpha_vantage_client import AlphaVantageClient
+    
+    # Initialize Google AI (Gemini) LLM
+    llm = ChatGoogleGenerativeAI(
+        model=CFG.google_ai_model,
+        google_api_key=CFG.google_ai_key,
+        temperature=0.7,
+        convert_system_message_to_human=True
+    )
+    
+    # Initialize data clients
+    coingecko_client = CoinGeckoClient()
+    alpha_vantage_client = AlphaVantageClient(
+        api_key=CFG.alpha_key
+    )
+    
+    # Initialize ML model
+    rf_model = RandomForestStrategyModel()
+    model_path = CFG.model_path
+    if os.path.exists(model_path):
+        rf_model.load(model_path)
+    else:
+        logger.warning(f"Model not found at {model_path}. Using untrained model.")
+    
+    # Initialize tools (the vector store is attached once _init_knowledge_base finishes)
+    tools = AgentTools(
+        coingecko_client=coingecko_client,
+        alpha_vantage_client=alpha_vantage_client,
+        vector_store=services.vector_store,
+        # Concurrent requests share one predict_proba call per ~10ms window
+        rf_model=PredictionBatcher(rf_model),
+        portfolio_manager=services.portfolio_manager,
+        news_client=services.news_client
+    )
+    
+    return InvestmentAgent(llm=llm, tools=tools)
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Lifespan context manager for startup/shutdown"""
-    global agent, vector_store
+async def get_agent() -> "InvestmentAgent":
+    """Return the shared agent, building it on the first call"""
+    if services.agent is not None:
+        return services.agent
     
-    # Startup
-    logger.info("Starting up services...")
+    async with services.lock:
+        # Another request may have finished building while we waited
+        if services.agent is None:
+            logger.info("Initializing agent...")
+            agent = await asyncio.to_thread(_build_agent)
+            if agent.tools.vector_store is None:
+                agent.tools.vector_store = services.vector_store
+            services.agent = agent
+            logger.info("Agent initialized successfully")
     
+    return services.agent
+
+
+def _build_knowledge_base() -> "VectorStore":
+    """Open the vector store and seed the default knowledge base"""
+    from src.rag.vector_store import VectorStore
+    from src.rag.knowledge_base import initialize_knowledge_base
+    
+    vector_store = VectorStore.get_or_create(
+        chroma_db_path=CFG.chroma_path
+    )
+    initialize_knowledge_base(vector_store)
+    return vector_store
+
+
+async def _init_knowledge_base(ready: asyncio.Event):
+    """Background startup task: build the knowledge base without blocking requests"""
     try:
-        # Initialize Google AI (Gemini) LLM
-        llm = ChatGoogleGenerativeAI(
-            model=os.getenv("GOOGLE_AI_MODEL", "gemini-pro"),
-            google_api_key=os.getenv("GOOGLE_AI_API_KEY"),
-            temperature=0.7,
-            convert_system_message_to_human=True
-        )
-        
-        # Initialize data clients
-        coingecko_client = CoinGeckoClient()
-        alpha_vantage_client = AlphaVantageClient(
-            api_key=os.getenv("ALPHA_VANTAGE_API_KEY", "")
-        )
-        
-        # Initialize vector store
-        try:
-            vector_store = VectorStore(
-                chroma_db_path=os.getenv("CHROMA_DB_PATH", "./data/chroma_db")
-            )
-            initialize_knowledge_base(vector_store)
-        except Exception as e:
-            logger.error(f"Error initializing knowledge base: {e}. Continuing without it.")
+        services.vector_store = await asyncio.to_thread(_build_knowledge_base)
+        if services.agent is not None:
+            services.agent.tools.vector_store = services.vector_store
+        logger.info("Knowledge base ready")
+    except Exception as e:
+        logger.error(f"Error initializing knowledge base: {e}. Continuing without it.")
+    finally:
+        ready.set()
+
+
+async def _refresh_market_data(agent: "InvestmentAgent", key: Tuple[str, int]) -> Dict[str, Any]:
+    """Fetch market data for key and store it in the cache (one fetch per key at a time)"""
+    lock = _market_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        # A concurrent caller may have refreshed the entry while we waited
+        cached_at, cached = _market_cache.get(key, (0.0, None))
+        if cached is not None and time.monotonic() - cached_at < MARKET_FRESH_TTL:
+            return cached
         
-        # Initialize ML model
-        rf_model = RandomForestStrategyModel()
-        model_path = os.getenv("MODEL_PATH", "./models/random_forest_model.pkl")
-        if os.path.exists(model_path):
-            rf_model.load(model_path)
-        else:
-            logger.warning(f"Model not found at {model_path}. Using untrained model.")
+        symbol, days = key
+        market_data = await agent.tools.get_market_data_async(symbol, days)
         
-        # Initialize tools
-        news_client = NewsClient()
-        portfolio_manager = PortfolioManager()
+        if "error" not in market_data:
+            _market_cache[key] = (time.monotonic(), market_data)
+            _market_cache.move_to_end(key)
+            while len(_market_cache) > MARKET_CACHE_SIZE:
+                evicted, _ = _market_cache.popitem(last=False)
+                evicted_lock = _market_locks.get(evicted)
+                if evicted_lock is not None and not evicted_lock.locked():
+                    del _market_locks[evicted]
         
-        tools = AgentTools(
-            coingecko_client=coingecko_client,
-            alpha_vantage_client=alpha_vantage_client,
-            vector_store=vector_store,
-            rf_model=rf_model,
-            portfolio_manager=portfolio_manager,
-            news_client=news_client
-        )
+        return market_data
+
+
+async def _get_cached_market_data(agent: "InvestmentAgent", symbol: str, days: int) -> Dict[str, Any]:
+    """Serve market data from cache, refreshing stale entries in the background"""
+    key = (symbol, days)
+    cached_at, cached = _market_cache.get(key, (0.0, None))
+    
+    if cached is None:
+        return await _refresh_market_data(agent, key)
+    
+    _market_cache.move_to_end(key)
+    lock = _market_locks.get(key)
+    if time.monotonic() - cached_at >= MARKET_FRESH_TTL and not (lock and lock.locked()):
+        task = asyncio.create_task(_refresh_market_data(agent, key))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    
+    return cached
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Lifespan context manager for startup/shutdown"""
+    # Startup: only cheap services here, the agent stack is built on first use
+    logger.info("Starting up services...")
+    
+    try:
+        from src.portfolio.portfolio_manager import PortfolioManager
+        from src.data_ingestion.news_client import NewsClient
+        from src.drift.drift_detector import DriftDetector
         
-        # Initialize Drift Detector
-        drift_detector = DriftDetector()
+        services.news_client = NewsClient()
+        services.portfolio_manager = PortfolioManager()
+        services.drift_detector = DriftDetector()
         
-        # Initialize agent
-        agent = InvestmentAgent(llm=llm, tools=tools)
+        # Seed the knowledge base in the background; /health reports readiness
+        services.kb_ready = asyncio.Event()
+        task = asyncio.create_task(_init_knowledge_base(services.kb_ready))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
         
         logger.info("Services initialized successfully")
         
@@ -105,6 +214,10 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down services...")
+    if services.drift_detector is not None:
+        services.drift_detector.flush()
+    if services.portfolio_manager is not None:
+        services.portfolio_manager.flush()
 
 
 # Create FastAPI app
@@ -112,7 +225,8 @@ app = FastAPI(
     title="Investment Assistant API",
     description="API for intelligent investment analysis",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -133,6 +247,8 @@ class AnalyzeRequest(BaseModel):
 
 
 class AnalyzeResponse(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
     symbol: str
     query: str
     analysis: str
@@ -142,6 +258,8 @@ class AnalyzeResponse(BaseModel):
 
 
 class PriceResponse(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
     symbol: str
     price: float
     rsi: Optional[float] = None
@@ -150,6 +268,32 @@ class PriceResponse(BaseModel):
     volatility: Optional[float] = None
 
 
+# Built once at import; the analyze endpoints validate their raw body with it
+# directly instead of going through FastAPI's per-request body resolution
+_ANALYZE_REQUEST = TypeAdapter(AnalyzeRequest)
+
+# Body schema for the OpenAPI docs, since the endpoints take a raw Request
+_ANALYZE_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": AnalyzeRequest.model_json_schema()}}
+    }
+}
+
+
+async def _parse_analyze_request(http_request: Request) -> AnalyzeRequest:
+    """Validate an AnalyzeRequest body, reporting errors like FastAPI does"""
+    try:
+        return _ANALYZE_REQUEST.validate_json(await http_request.body())
+    except ValidationError as e:
+        raise RequestValidationError([{**err, "loc": ("body", *err["loc"])} for err in e.errors()])
+
+
+def _optional_float(value: Any) -> Optional[float]:
+    """Coerce numpy scalars to plain floats for JSON encoding"""
+    return None if value is None else float(value)
+
+
 class AddAssetRequest(BaseModel):
     symbol: str
     quantity: float
@@ -163,38 +307,51 @@ class RemoveAssetRequest(BaseModel):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {
+    return ORJSONResponse(content={
         "status": "healthy",
         "service": "Investment Assistant API",
-        "version": "1.0.0"
-    }
+        "version": "1.0.0",
+        "ready": services.kb_ready.is_set()
+    })
 
 
-@app.post("/v1/chat/analyze", response_model=AnalyzeResponse)
-async def analyze_asset(request: AnalyzeRequest):
+@app.post(
+    "/v1/chat/analyze",
+    response_model=AnalyzeResponse,
+    openapi_extra=_ANALYZE_OPENAPI
+)
+async def analyze_asset(http_request: Request):
     """
     Analyze an asset and provide investment recommendation
     
     Args:
-        request: AnalyzeRequest with symbol and query
+        http_request: Raw request whose JSON body is an AnalyzeRequest
     
     Returns:
         AnalyzeResponse with analysis results
     """
-    if agent is None:
+    request = await _parse_analyze_request(http_request)
+    
+    try:
+        agent = await get_agent()
+    except Exception as e:
+        logger.error(f"Error initializing agent: {e}")
         raise HTTPException(status_code=503, detail="Agent not initialized")
     
     try:
-        result = agent.analyze(symbol=request.symbol, query=request.query)
+        await asyncio.wait_for(services.kb_ready.wait(), timeout=60)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Knowledge base not ready")
+    
+    try:
+        # The agent does blocking HTTP/LLM/sklearn work; keep it off the event loop
+        result = await asyncio.to_thread(agent.analyze, symbol=request.symbol, query=request.query)
         
         # Log for drift detection
-        if drift_detector and result.get("model_prediction"):
-            pred = result["model_prediction"]
-            confidence = pred.get("confidence", 0.0)
-            strategy = pred.get("strategy", "UNKNOWN")
-            drift_detector.update_reference(confidence, strategy)
+        _log_prediction(result)
         
-        return AnalyzeResponse(
+        # Values come from our own agent, so skip construction-time validation
+        return AnalyzeResponse.model_construct(
             symbol=result.get("symbol", request.symbol),
             query=result.get("query", request.query),
             analysis=result.get("analysis", ""),
@@ -208,7 +365,57 @@ async def analyze_asset(request: AnalyzeRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/v1/market/price/{symbol}", response_model=PriceResponse)
+def _log_prediction(result: Dict[str, Any]):
+    """Feed an analysis result's model prediction to the drift detector"""
+    drift_detector = services.drift_detector
+    if drift_detector and result.get("model_prediction"):
+        pred = result["model_prediction"]
+        confidence = pred.get("confidence", 0.0)
+        strategy = pred.get("strategy", "UNKNOWN")
+        drift_detector.update_reference(confidence, strategy)
+
+
+@app.post("/v1/chat/analyze/stream", openapi_extra=_ANALYZE_OPENAPI)
+async def analyze_asset_stream(http_request: Request):
+    """
+    Analyze an asset, streaming the agent's output as newline-delimited JSON
+    
+    Args:
+        http_request: Raw request whose JSON body is an AnalyzeRequest
+    
+    Returns:
+        StreamingResponse of {"type": "token"} lines followed by one
+        {"type": "result"} line shaped like AnalyzeResponse
+    """
+    request = await _parse_analyze_request(http_request)
+    
+    try:
+        agent = await get_agent()
+    except Exception as e:
+        logger.error(f"Error initializing agent: {e}")
+        raise HTTPException(status_code=503, detail="Agent not initialized")
+    
+    try:
+        await asyncio.wait_for(services.kb_ready.wait(), timeout=60)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Knowledge base not ready")
+    
+    async def events():
+        async for event in agent.analyze_stream(symbol=request.symbol, query=request.query):
+            if event["type"] == "result":
+                _log_prediction(event)
+            yield orjson.dumps(event, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+# Hottest endpoint: return a plain dict (response_model=None) so FastAPI skips
+# outbound validation; PriceResponse is still used for the OpenAPI schema
+@app.get(
+    "/v1/market/price/{symbol}",
+    response_model=None,
+    responses={200: {"model": PriceResponse}}
+)
 async def get_market_price(symbol: str, days: int = 30):
     """
     Get market price and technical indicators for a symbol
@@ -218,25 +425,28 @@ async def get_market_price(symbol: str, days: int = 30):
         days: Number of days of historical data
     
     Returns:
-        PriceResponse with price and indicators
+        Dict shaped like PriceResponse with price and indicators
     """
-    if agent is None or agent.tools is None:
+    try:
+        agent = await get_agent()
+    except Exception as e:
+        logger.error(f"Error initializing agent: {e}")
         raise HTTPException(status_code=503, detail="Agent not initialized")
     
     try:
-        market_data = agent.tools.get_market_data(symbol=symbol, days=days)
+        market_data = await _get_cached_market_data(agent, symbol, days)
         
         if "error" in market_data:
             raise HTTPException(status_code=404, detail=market_data["error"])
         
-        return PriceResponse(
-            symbol=market_data.get("symbol", symbol),
-            price=market_data.get("latest_price", 0),
-            rsi=market_data.get("rsi"),
-            sma_10=market_data.get("sma_10"),
-            sma_20=market_data.get("sma_20"),
-            volatility=market_data.get("volatility")
-        )
+        return {
+            "symbol": market_data.get("symbol", symbol),
+            "price": float(market_data.get("latest_price", 0)),
+            "rsi": _optional_float(market_data.get("rsi")),
+            "sma_10": _optional_float(market_data.get("sma_10")),
+            "sma_20": _optional_float(market_data.get("sma_20")),
+            "volatility": _optional_float(market_data.get("volatility"))
+        }
         
     except HTTPException:
         raise
@@ -246,24 +456,28 @@ async def get_market_price(symbol: str, days: int = 30):
 
 @app.get("/v1/portfolio")
 async def get_portfolio():
+    portfolio_manager = services.portfolio_manager
     if portfolio_manager is None:
         raise HTTPException(status_code=503, detail="Portfolio Manager not initialized")
     return portfolio_manager.get_portfolio_summary()
 
 @app.post("/v1/portfolio/add")
 async def add_asset(request: AddAssetRequest):
+    portfolio_manager = services.portfolio_manager
     if portfolio_manager is None:
         raise HTTPException(status_code=503, detail="Portfolio Manager not initialized")
     return portfolio_manager.add_asset(request.symbol, request.quantity, request.purchase_price)
 
 @app.post("/v1/portfolio/remove")
 async def remove_asset(request: RemoveAssetRequest):
+    portfolio_manager = services.portfolio_manager
     if portfolio_manager is None:
         raise HTTPException(status_code=503, detail="Portfolio Manager not initialized")
     return portfolio_manager.remove_asset(request.symbol, request.quantity)
 
 @app.get("/v1/drift")
 async def get_drift_report():
+    drift_detector = services.drift_detector
     if drift_detector is None:
         raise HTTPException(status_code=503, detail="Drift Detector not initialized")
     
@@ -293,17 +507,35 @@ async def get_drift_report():
 
 @app.post("/v1/news/fetch")
 async def fetch_news(category: str = "general"):
-    if news_client is None or vector_store is None:
+    try:
+        agent = await get_agent()
+    except Exception as e:
+        logger.error(f"Error initializing agent: {e}")
+        raise HTTPException(status_code=503, detail="Services not initialized")
+    
+    if services.news_client is None or services.vector_store is None:
          raise HTTPException(status_code=503, detail="Services not initialized")
     
     try:
-        msg = agent.tools.fetch_latest_news(category)
+        msg = await asyncio.to_thread(agent.tools.fetch_latest_news, category)
         return {"message": msg}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-if __name__ == "__main__":
+def main():
+    """Run the API with uvicorn (uvloop event loop + httptools parser)"""
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        "src.api.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=CFG.api_workers
+    )
+
+
+if __name__ == "__main__":
+    main()
 
@@ -1,15 +1,19 @@
 """Streamlit main application"""
 
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
-import os
-from dotenv import load_dotenv
+import sys
+from pathlib import Path
 
-load_dotenv()
+# `streamlit run src/app/main.py` only puts src/app on the path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.config import get_config
+
+CFG = get_config()
 
 # Page configuration
 st.set_page_config(
@@ -19,19 +23,51 @@ st.set_page_config(
 )
 
 # API configuration
-API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+API_BASE_URL = CFG.api_base_url
+
+# Assets offered in the analysis selector
+SYMBOLS = ("BTC", "ETH", "SPY", "QQQ", "VTI", "bitcoin", "ethereum")
+
+
+@st.cache_resource
+def _http() -> requests.Session:
+    """Shared HTTP session so API calls reuse keep-alive connections across reruns"""
+    session = requests.Session()
+    session.headers.update({"Accept": "application/json"})
+    return session
+
+
+# Read-only API calls are memoized across reruns. The cached helpers raise on
+# failure (exceptions are not cached) and the wrappers do the UI reporting.
+@st.cache_data(ttl=30, show_spinner=False)
+def _get_market_data(symbol: str, days: int) -> Dict[str, Any]:
+    response = _http().get(
+        f"{API_BASE_URL}/v1/market/price/{symbol}",
+        params={"days": days},
+        timeout=30
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+@st.cache_data(ttl=10, show_spinner=False)
+def _get_portfolio() -> Dict[str, Any]:
+    response = _http().get(f"{API_BASE_URL}/v1/portfolio", timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _get_drift_report() -> Dict[str, Any]:
+    response = _http().get(f"{API_BASE_URL}/v1/drift", timeout=10)
+    response.raise_for_status()
+    return response.json()
 
 
 def fetch_market_data(symbol: str, days: int = 30) -> Dict[str, Any]:
     """Fetch market data from API"""
     try:
-        response = requests.get(
-            f"{API_BASE_URL}/v1/market/price/{symbol}",
-            params={"days": days},
-            timeout=30
-        )
-        response.raise_for_status()
-        return response.json()
+        return _get_market_data(symbol, days)
     except Exception as e:
         st.error(f"Error fetching market data: {e}")
         return {}
@@ -40,7 +76,7 @@ def fetch_market_data(symbol: str, days: int = 30) -> Dict[str, Any]:
 def analyze_asset(symbol: str, query: str) -> Dict[str, Any]:
     """Analyze asset using API"""
     try:
-        response = requests.post(
+        response = _http().post(
             f"{API_BASE_URL}/v1/chat/analyze",
             json={"symbol": symbol, "query": query},
             timeout=120
@@ -53,32 +89,31 @@ def analyze_asset(symbol: str, query: str) -> Dict[str, Any]:
 
 def fetch_portfolio() -> Dict[str, Any]:
     try:
-        response = requests.get(f"{API_BASE_URL}/v1/portfolio", timeout=10)
-        return response.json()
+        return _get_portfolio()
     except Exception as e:
         return {"error": str(e)}
 
 def add_asset_to_portfolio(symbol: str, quantity: float, price: float):
     try:
-        requests.post(
+        _http().post(
             f"{API_BASE_URL}/v1/portfolio/add", 
             json={"symbol": symbol, "quantity": quantity, "purchase_price": price},
             timeout=10
         )
+        _get_portfolio.clear()
         st.success(f"Added {quantity} {symbol} to portfolio.")
     except Exception as e:
         st.error(f"Error adding asset: {e}")
 
 def get_drift_report() -> Dict[str, Any]:
     try:
-        response = requests.get(f"{API_BASE_URL}/v1/drift", timeout=10)
-        return response.json()
+        return _get_drift_report()
     except Exception as e:
         return {"error": str(e)}
 
 def refresh_news():
     try:
-        requests.post(f"{API_BASE_URL}/v1/news/fetch", timeout=30)
+        _http().post(f"{API_BASE_URL}/v1/news/fetch", timeout=30)
         st.success("News refreshed successfully!")
     except Exception as e:
         st.error(f"Error refreshing news: {e}")
@@ -97,7 +132,7 @@ with tab1:
         with col_s1:
             symbol = st.selectbox(
                 "Seleccionar Activo",
-                options=["BTC", "ETH", "SPY", "QQQ", "VTI", "bitcoin", "ethereum"],
+                options=SYMBOLS,
                 index=0
             )
         with col_s2:
@@ -115,8 +150,14 @@ with tab1:
     
     if st.button("🔍 Analizar", type="primary"):
         with st.spinner("Analizando activo..."):
-            market_data = fetch_market_data(symbol, days)
-            analysis_result = analyze_asset(symbol, query)
+            # Both requests are independent; issue them concurrently. Worker
+            # threads get the script context so st.error calls still render.
+            ctx = get_script_run_ctx()
+            with ThreadPoolExecutor(max_workers=2, initializer=add_script_run_ctx, initargs=(None, ctx)) as executor:
+                market_future = executor.submit(fetch_market_data, symbol, days)
+                analysis_future = executor.submit(analyze_asset, symbol, query)
+                market_data = market_future.result()
+                analysis_result = analysis_future.result()
         
         if "error" not in analysis_result:
             st.header("📊 Resultado del Análisis")
@@ -160,6 +201,10 @@ with tab2:
     # View Portfolio
     portfolio = fetch_portfolio()
     if "assets" in portfolio and portfolio["assets"]:
+        # Charting stack is only imported when there is something to plot
+        import pandas as pd
+        import plotly.express as px
+        
         df_port = pd.DataFrame(portfolio["assets"])
         st.dataframe(df_port, use_container_width=True)
         
@@ -0,0 +1,47 @@
+"""Shared configuration helpers"""
+
+import functools
+import os
+from typing import NamedTuple, Optional
+
+
+@functools.lru_cache(maxsize=1)
+def load_env() -> bool:
+    """Load variables from .env once per process"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return True
+
+
+class Config(NamedTuple):
+    """Immutable snapshot of the environment settings used across the app"""
+
+    api_base_url: str
+    api_workers: int
+    mlflow_uri: str
+    experiment: str
+    chroma_path: str
+    model_path: str
+    google_ai_key: Optional[str]
+    google_ai_model: str
+    alpha_key: str
+
+
+@functools.lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Read the environment (after loading .env) once and return the snapshot"""
+    load_env()
+    return Config(
+        api_base_url=os.getenv("API_BASE_URL", "http://localhost:8000"),
+        # Caches, batchers, drift state and batched portfolio writes are all
+        # per process, so more than one worker is unsafe until they are shared
+        api_workers=int(os.getenv("WORKERS", "1")),
+        mlflow_uri=os.getenv("MLFLOW_TRACKING_URI", "./mlruns"),
+        experiment=os.getenv("MLFLOW_EXPERIMENT_NAME", "investment_assistant"),
+        chroma_path=os.getenv("CHROMA_DB_PATH", "./data/chroma_db"),
+        model_path=os.getenv("MODEL_PATH", "./models/random_forest_model.pkl"),
+        google_ai_key=os.getenv("GOOGLE_AI_API_KEY"),
+        google_ai_model=os.getenv("GOOGLE_AI_MODEL", "gemini-pro"),
+        alpha_key=os.getenv("ALPHA_VANTAGE_API_KEY", ""),
+    )
@@ -1,21 +1,105 @@
 """Alpha Vantage API client for ETF and stock data"""
 
+import asyncio
+import orjson
 import requests
 import pandas as pd
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import logging
+import time
 from datetime import datetime
 
+from src.data_ingestion.http_session import RETRY_STATUSES, create_session
+from src.data_ingestion.rate_limiter import RateLimitError, TokenBucket
+from src.data_ingestion.response_cache import ResponseCache, default_cache
+
 logger = logging.getLogger(__name__)
 
+# Free tier quota (5 requests/minute), shared by every client in the process
+default_rate_limiter = TokenBucket(rate=5, per=60.0)
+
 
 class AlphaVantageClient:
     """Client for fetching ETF and stock data from Alpha Vantage API"""
     
-    def __init__(self, api_key: str, base_url: str = "https://www.alphavantage.co/query", timeout: int = 30):
+    # Daily bars only change once per trading day
+    DAILY_TTL = 6 * 60 * 60
+    
+    # Backoff after a rate-limit response: 1s, 2s, 4s... capped at MAX_BACKOFF
+    MAX_RETRIES = 4
+    MAX_BACKOFF = 30.0
+    
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://www.alphavantage.co/query",
+        timeout: int = 30,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[TokenBucket] = None
+    ):
         self.api_key = api_key
         self.base_url = base_url
         self.timeout = timeout
+        self.cache = cache or default_cache
+        self.rate_limiter = rate_limiter or default_rate_limiter
+        # 429s are backed off by _request against the shared token bucket;
+        # urllib3 retrying them too would multiply the attempts per call
+        self.session = create_session(retry_statuses=[s for s in RETRY_STATUSES if s != 429])
+    
+    def close(self):
+        """Close the pooled HTTP session"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _request(self, params: Dict) -> Dict:
+        """
+        Throttled GET with exponential backoff on rate-limit responses
+        
+        Args:
+            params: Query parameters (apikey included)
+        
+        Returns:
+            Decoded JSON payload
+        
+        Raises:
+            RateLimitError: If the quota is still exhausted after MAX_RETRIES retries
+            ValueError: If the API answers with a non-throttling "Information"
+                message (e.g. invalid key or premium endpoint), without retrying
+        """
+        for attempt in range(self.MAX_RETRIES + 1):
+            self.rate_limiter.acquire()
+            
+            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            if response.status_code == 429:
+                # HTTP-level throttling is backed off here, not by the session
+                note = "HTTP 429 Too Many Requests"
+            else:
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+                
+                # Alpha Vantage signals throttling with a 200 and a "Note" message; newer
+                # responses use "Information", which also reports key/plan problems
+                # that retrying cannot fix (and would waste quota on)
+                note = data.get("Note")
+                info = data.get("Information")
+                if not note and info:
+                    if "rate limit" not in info.lower():
+                        raise ValueError(f"Alpha Vantage API Error: {info}")
+                    note = info
+                if not note:
+                    return data
+            
+            if attempt < self.MAX_RETRIES:
+                delay = min(2 ** attempt, self.MAX_BACKOFF)
+                logger.warning(f"Alpha Vantage rate limit hit, retrying in {delay}s")
+                time.sleep(delay)
+        
+        raise RateLimitError(f"Alpha Vantage API Rate Limit: {note}")
     
     def get_time_series_daily(
         self, 
@@ -23,7 +107,7 @@ class AlphaVantageClient:
         outputsize: str = "compact"
     ) -> pd.DataFrame:
         """
-        Fetch daily time series data for an ETF or stock
+        Fetch daily time series data for an ETF or stock (cached for DAILY_TTL)
         
         Args:
             symbol: Stock/ETF symbol (e.g., 'SPY', 'QQQ')
@@ -32,6 +116,14 @@ class AlphaVantageClient:
         Returns:
             DataFrame with columns: date, open, high, low, close, volume
         """
+        return self.cache.get_or_fetch(
+            f"av:ts_daily:{symbol}:{outputsize}",
+            self.DAILY_TTL,
+            lambda: self._fetch_time_series_daily(symbol, outputsize)
+        )
+    
+    def _fetch_time_series_daily(self, symbol: str, outputsize: str) -> pd.DataFrame:
+        """Request TIME_SERIES_DAILY and build the DataFrame"""
         try:
             params = {
                 "function": "TIME_SERIES_DAILY",
@@ -41,15 +133,11 @@ class AlphaVantageClient:
                 "datatype": "json"
             }
             
-            response = requests.get(self.base_url, params=params, timeout=self.timeout)
-            response.raise_for_status()
-            data = response.json()
+            data = self._request(params)
             
             # Check for API errors
             if "Error Message" in data:
                 raise ValueError(f"Alpha Vantage API Error: {data['Error Message']}")
-            if "Note" in data:
-                raise ValueError(f"Alpha Vantage API Rate Limit: {data['Note']}")
             
             # Extract time series data
             time_series = data.get("Time Series (Daily)", {})
@@ -57,20 +145,23 @@ class AlphaVantageClient:
             if not time_series:
                 raise ValueError(f"No time series data found for symbol {symbol}")
             
-            # Convert to DataFrame
-            records = []
-            for date_str, values in time_series.items():
-                records.append({
-                    "date": pd.to_datetime(date_str),
-                    "open": float(values["1. open"]),
-                    "high": float(values["2. high"]),
-                    "low": float(values["3. low"]),
-                    "close": float(values["4. close"]),
-                    "volume": int(values["5. volume"])
-                })
-            
-            df = pd.DataFrame(records)
-            df = df.sort_values("date").reset_index(drop=True)
+            # Convert to DataFrame column-wise instead of one dict per day
+            df = pd.DataFrame.from_dict(time_series, orient="index").rename(columns={
+                "1. open": "open",
+                "2. high": "high",
+                "3. low": "low",
+                "4. close": "close",
+                "5. volume": "volume"
+            })
+            df = df[["open", "high", "low", "close", "volume"]].astype({
+                "open": "float32",
+                "high": "float32",
+                "low": "float32",
+                "close": "float32",
+                "volume": "int64"
+            })
+            df.index = pd.to_datetime(df.index)
+            df = self._chronological(df).rename_axis("date").reset_index()
             
             # Use close as price for consistency
             df["price"] = df["close"]
@@ -85,6 +176,34 @@ class AlphaVantageClient:
             logger.error(f"Unexpected error processing Alpha Vantage data: {e}")
             raise
     
+    async def get_many(
+        self,
+        symbols: List[str],
+        outputsize: str = "compact"
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch daily time series for several symbols concurrently
+        
+        Args:
+            symbols: Stock/ETF symbols
+            outputsize: 'compact' or 'full'
+        
+        Returns:
+            Dict mapping symbol to DataFrame (symbols that failed are omitted)
+        """
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self.get_time_series_daily, symbol, outputsize) for symbol in symbols),
+            return_exceptions=True
+        )
+        
+        frames = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Skipping {symbol}: {result}")
+            else:
+                frames[symbol] = result
+        return frames
+    
     def get_technical_indicators(
         self,
         symbol: str,
@@ -93,7 +212,7 @@ class AlphaVantageClient:
         time_period: int = 14
     ) -> pd.DataFrame:
         """
-        Fetch technical indicators from Alpha Vantage
+        Fetch technical indicators from Alpha Vantage (cached for DAILY_TTL)
         
         Args:
             symbol: Stock/ETF symbol
@@ -102,54 +221,72 @@ class AlphaVantageClient:
             time_period: Period for the indicator
         
         Returns:
-            DataFrame with indicator values
+            DataFrame with indicator values (empty if unavailable)
         """
         try:
-            function_map = {
-                "RSI": "RSI",
-                "SMA": "SMA",
-                "EMA": "EMA"
-            }
-            
-            function = function_map.get(indicator.upper(), "RSI")
-            
-            params = {
-                "function": function,
-                "symbol": symbol,
-                "interval": interval,
-                "time_period": time_period,
-                "series_type": "close",
-                "apikey": self.api_key,
-                "datatype": "json"
-            }
-            
-            response = requests.get(self.base_url, params=params, timeout=self.timeout)
-            response.raise_for_status()
-            data = response.json()
-            
-            if "Error Message" in data or "Note" in data:
-                logger.warning(f"Could not fetch {indicator} for {symbol}")
-                return pd.DataFrame()
-            
-            # Extract indicator data
-            key = f"Technical Analysis: {function}"
-            if key not in data:
-                return pd.DataFrame()
-            
-            indicator_data = data[key]
-            records = []
-            for date_str, values in indicator_data.items():
-                records.append({
-                    "date": pd.to_datetime(date_str),
-                    indicator.lower(): float(values[function])
-                })
-            
-            df = pd.DataFrame(records)
-            df = df.sort_values("date").reset_index(drop=True)
-            
-            return df
-            
+            return self.cache.get_or_fetch(
+                f"av:indicator:{symbol}:{indicator.upper()}:{interval}:{time_period}",
+                self.DAILY_TTL,
+                lambda: self._fetch_technical_indicators(symbol, indicator, interval, time_period)
+            )
         except Exception as e:
             logger.warning(f"Error fetching technical indicator {indicator}: {e}")
             return pd.DataFrame()
-
+    
+    def _fetch_technical_indicators(
+        self,
+        symbol: str,
+        indicator: str,
+        interval: str,
+        time_period: int
+    ) -> pd.DataFrame:
+        """Request an indicator series; raises when the API returns no data"""
+        function_map = {
+            "RSI": "RSI",
+            "SMA": "SMA",
+            "EMA": "EMA"
+        }
+        
+        function = function_map.get(indicator.upper(), "RSI")
+        
+        params = {
+            "function": function,
+            "symbol": symbol,
+            "interval": interval,
+            "time_period": time_period,
+            "series_type": "close",
+            "apikey": self.api_key,
+            "datatype": "json"
+        }
+        
+        data = self._request(params)
+        
+        if "Error Message" in data:
+            raise ValueError(f"Could not fetch {indicator} for {symbol}")
+        
+        # Extract indicator data
+        key = f"Technical Analysis: {function}"
+        if key not in data:
+            raise ValueError(f"No {indicator} data found for symbol {symbol}")
+        
+        indicator_data = data[key]
+        df = pd.DataFrame.from_dict(indicator_data, orient="index")[[function]]
+        df = df.astype("float64").rename(columns={function: indicator.lower()})
+        df.index = pd.to_datetime(df.index)
+        df = self._chronological(df).rename_axis("date").reset_index()
+        
+        return df
+    
+    @staticmethod
+    def _chronological(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Put a date-indexed frame in ascending order
+        
+        Alpha Vantage returns newest-first, so a reversal is normally enough;
+        the O(N log N) sort only runs if the payload is out of order.
+        """
+        if df.index.is_monotonic_increasing:
+            return df
+        if df.index.is_monotonic_decreasing:
+            return df.iloc[::-1]
+        return df.sort_index()
@@ -1,20 +1,47 @@
 """CoinGecko API client for cryptocurrency data"""
 
+import asyncio
+import numpy as np
+import orjson
 import requests
 import pandas as pd
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import logging
 
+from src.data_ingestion.http_session import create_session
+from src.data_ingestion.response_cache import ResponseCache, default_cache
+
 logger = logging.getLogger(__name__)
 
 
 class CoinGeckoClient:
     """Client for fetching cryptocurrency data from CoinGecko API"""
     
-    def __init__(self, base_url: str = "https://api.coingecko.com/api/v3", timeout: int = 30):
+    # Daily history only changes at the last point; spot prices move constantly
+    HISTORY_TTL = 6 * 60 * 60
+    PRICE_TTL = 30
+    
+    def __init__(
+        self,
+        base_url: str = "https://api.coingecko.com/api/v3",
+        timeout: int = 30,
+        cache: Optional[ResponseCache] = None
+    ):
         self.base_url = base_url
         self.timeout = timeout
+        self.cache = cache or default_cache
+        self.session = create_session()
+    
+    def close(self):
+        """Close the pooled HTTP session"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
     
     def get_price_history(
         self, 
@@ -23,7 +50,7 @@ class CoinGeckoClient:
         vs_currency: str = "usd"
     ) -> pd.DataFrame:
         """
-        Fetch historical price data for a cryptocurrency
+        Fetch historical price data for a cryptocurrency (cached for HISTORY_TTL)
         
         Args:
             coin_id: CoinGecko coin ID (e.g., 'bitcoin', 'ethereum')
@@ -33,6 +60,14 @@ class CoinGeckoClient:
         Returns:
             DataFrame with columns: date, price, market_cap, volume
         """
+        return self.cache.get_or_fetch(
+            f"cg:mc:{coin_id}:{days}:{vs_currency}",
+            self.HISTORY_TTL,
+            lambda: self._fetch_price_history(coin_id, days, vs_currency)
+        )
+    
+    def _fetch_price_history(self, coin_id: str, days: int, vs_currency: str) -> pd.DataFrame:
+        """Request market_chart and build the DataFrame"""
         try:
             url = f"{self.base_url}/coins/{coin_id}/market_chart"
             params = {
@@ -41,31 +76,29 @@ class CoinGeckoClient:
                 "interval": "daily"
             }
             
-            response = requests.get(url, params=params, timeout=self.timeout)
+            response = self.session.get(url, params=params, timeout=self.timeout)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # Extract price data
             prices = data.get("prices", [])
             market_caps = data.get("market_caps", [])
             volumes = data.get("total_volumes", [])
             
-            # Create DataFrame
-            df = pd.DataFrame(prices, columns=["timestamp", "price"])
-            df["date"] = pd.to_datetime(df["timestamp"], unit="ms")
+            # Create DataFrame from one array; the three series share timestamps
+            price_arr = np.asarray(prices, dtype=np.float64).reshape(-1, 2)
+            df = pd.DataFrame({
+                "date": pd.to_datetime(price_arr[:, 0], unit="ms"),
+                "price": price_arr[:, 1]
+            })
             
             # Add market cap and volume
-            if market_caps:
-                df_mc = pd.DataFrame(market_caps, columns=["timestamp", "market_cap"])
-                df = df.merge(df_mc[["timestamp", "market_cap"]], on="timestamp", how="left")
-            
-            if volumes:
-                df_vol = pd.DataFrame(volumes, columns=["timestamp", "volume"])
-                df = df.merge(df_vol[["timestamp", "volume"]], on="timestamp", how="left")
+            df["market_cap"] = self._align_series(market_caps, price_arr[:, 0])
+            df["volume"] = self._align_series(volumes, price_arr[:, 0])
             
-            # Select and reorder columns
-            df = df[["date", "price", "market_cap", "volume"]].copy()
-            df = df.sort_values("date").reset_index(drop=True)
+            # market_chart is returned oldest-first; only sort if that ever changes
+            if not df["date"].is_monotonic_increasing:
+                df = df.sort_values("date").reset_index(drop=True)
             
             logger.info(f"Fetched {len(df)} days of data for {coin_id}")
             return df
@@ -76,9 +109,66 @@ class CoinGeckoClient:
         except Exception as e:
             logger.error(f"Unexpected error processing CoinGecko data: {e}")
             raise
+
+    @staticmethod
+    def _align_series(points: List[List[float]], timestamps: np.ndarray) -> np.ndarray:
+        """
+        Return the values of a [timestamp, value] series aligned to timestamps
+
+        Args:
+            points: Raw [timestamp, value] pairs from market_chart
+            timestamps: Timestamps of the price series
+
+        Returns:
+            Values in timestamp order, NaN where a timestamp is missing
+        """
+        arr = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(arr) == len(timestamps) and np.array_equal(arr[:, 0], timestamps):
+            return arr[:, 1]
+
+        # Timestamps disagree: fall back to a lookup (equivalent to a left merge)
+        return pd.Series(arr[:, 1], index=arr[:, 0]).groupby(level=0).first().reindex(timestamps).to_numpy()
+
+    async def get_many(
+        self,
+        coin_ids: List[str],
+        days: int = 30,
+        vs_currency: str = "usd"
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch price history for several coins concurrently
+        
+        Args:
+            coin_ids: CoinGecko coin IDs
+            days: Number of days of historical data
+            vs_currency: Currency to compare against
+        
+        Returns:
+            Dict mapping coin ID to DataFrame (coins that failed are omitted)
+        """
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self.get_price_history, coin_id, days, vs_currency) for coin_id in coin_ids),
+            return_exceptions=True
+        )
+        
+        frames = {}
+        for coin_id, result in zip(coin_ids, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Skipping {coin_id}: {result}")
+            else:
+                frames[coin_id] = result
+        return frames
     
     def get_current_price(self, coin_id: str, vs_currency: str = "usd") -> Dict:
-        """Get current price for a cryptocurrency"""
+        """Get current price for a cryptocurrency (cached for PRICE_TTL)"""
+        return self.cache.get_or_fetch(
+            f"cg:price:{coin_id}:{vs_currency}",
+            self.PRICE_TTL,
+            lambda: self._fetch_current_price(coin_id, vs_currency)
+        )
+    
+    def _fetch_current_price(self, coin_id: str, vs_currency: str) -> Dict:
+        """Request simple/price for one coin"""
         try:
             url = f"{self.base_url}/simple/price"
             params = {
@@ -88,9 +178,9 @@ class CoinGeckoClient:
                 "include_24hr_vol": "true"
             }
             
-            response = requests.get(url, params=params, timeout=self.timeout)
+            response = self.session.get(url, params=params, timeout=self.timeout)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             return data.get(coin_id, {})
             
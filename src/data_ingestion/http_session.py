@@ -0,0 +1,45 @@
+"""Shared HTTP session factory for the API clients"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Iterable
+from urllib3.util.retry import Retry
+
+# Statuses retried at the HTTP level unless a client handles some itself
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def create_session(
+    pool_connections: int = 16,
+    pool_maxsize: int = 32,
+    retries: int = 3,
+    backoff_factor: float = 0.3,
+    retry_statuses: Iterable[int] = RETRY_STATUSES,
+) -> requests.Session:
+    """
+    Create a keep-alive session with a pooled adapter and retry/backoff
+
+    Args:
+        pool_connections: Number of host pools to keep
+        pool_maxsize: Connections kept open per host
+        retries: Retries for connection errors and retryable statuses
+        backoff_factor: Exponential backoff factor between retries
+        retry_statuses: HTTP statuses to retry (drop 429 for clients that back off themselves)
+
+    Returns:
+        Configured requests.Session
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=list(retry_statuses),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
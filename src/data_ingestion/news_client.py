@@ -1,12 +1,14 @@
 """
 News Client for fetching financial news
 """
-import requests
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import xml.etree.ElementTree as ET
 from datetime import datetime
 
+from src.data_ingestion.http_session import create_session
+from src.data_ingestion.response_cache import ResponseCache, default_cache
+
 logger = logging.getLogger(__name__)
 
 class NewsClient:
@@ -17,15 +19,19 @@ class NewsClient:
         "crypto": "https://cointelegraph.com/rss"
     }
     
-    def __init__(self):
-        self.session = requests.Session()
+    # Feeds refresh every few minutes at most
+    FEED_TTL = 5 * 60
+    
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        self.cache = cache or default_cache
+        self.session = create_session()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         })
 
     def get_news(self, category: str = "general", limit: int = 10) -> List[Dict[str, Any]]:
         """
-        Fetch news from RSS feed
+        Fetch news from RSS feed (cached for FEED_TTL)
         
         Args:
             category: 'general' or 'crypto'
@@ -37,38 +43,46 @@ class NewsClient:
         url = self.RSS_FEEDS.get(category, self.RSS_FEEDS["general"])
         
         try:
-            response = self.session.get(url, timeout=10)
+            return self.cache.get_or_fetch(
+                f"news:{category}:{limit}",
+                self.FEED_TTL,
+                lambda: self._fetch_news(url, category, limit)
+            )
+        except Exception as e:
+            logger.error(f"Error fetching news from {url}: {e}")
+            return []
+
+    def _fetch_news(self, url: str, category: str, limit: int) -> List[Dict[str, Any]]:
+        """Download and parse one RSS feed"""
+        # Stream the body into the parser and stop once we have enough items
+        with self.session.get(url, timeout=10, stream=True) as response:
             response.raise_for_status()
-            
-            # Simple XML parsing
-            root = ET.fromstring(response.content)
+            response.raw.decode_content = True
             
             items = []
-            for item in root.findall(".//item")[:limit]:
-                title = item.find("title").text if item.find("title") is not None else "No Title"
-                link = item.find("link").text if item.find("link") is not None else ""
-                pub_date = item.find("pubDate").text if item.find("pubDate") is not None else ""
-                description = item.find("description").text if item.find("description") is not None else ""
+            for _, elem in ET.iterparse(response.raw, events=("end",)):
+                if elem.tag != "item":
+                    continue
                 
-                # Check for CoinTelegraph content which might be in content:encoded?
-                # For now stick to description
+                # Read each child once instead of repeated find() calls
+                fields = {child.tag: child.text for child in elem}
                 
                 news_item = {
-                    "title": title,
-                    "link": link,
-                    "published_at": pub_date,
-                    "summary": description,
+                    "title": fields.get("title", "No Title"),
+                    "link": fields.get("link", ""),
+                    "published_at": fields.get("pubDate", ""),
+                    "summary": fields.get("description", ""),
                     "source": category,
                     "fetched_at": datetime.now().isoformat()
                 }
                 items.append(news_item)
+                elem.clear()
                 
-            logger.info(f"Fetched {len(items)} news items from {category}")
-            return items
+                if len(items) >= limit:
+                    break
             
-        except Exception as e:
-            logger.error(f"Error fetching news from {url}: {e}")
-            return []
+        logger.info(f"Fetched {len(items)} news items from {category}")
+        return items
 
     def process_and_structure_for_rag(self, news_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
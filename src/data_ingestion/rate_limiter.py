@@ -0,0 +1,41 @@
+"""Client-side rate limiting for quota-bound APIs"""
+
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitError(Exception):
+    """Raised when a provider reports that the request quota is exhausted"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` calls per `per` seconds"""
+
+    def __init__(self, rate: int, per: float):
+        self.capacity = float(rate)
+        self.fill_rate = rate / per
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.fill_rate
+                )
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.fill_rate
+
+            logger.debug(f"Rate limit reached, waiting {wait:.2f}s")
+            time.sleep(wait)
@@ -0,0 +1,86 @@
+"""In-process TTL cache for external API responses"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with per-entry TTL and stale-on-error fallback"""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One in-flight fetch per key; concurrent misses wait for its result
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+
+    def get_or_fetch(self, key: str, ttl: float, fetch_fn: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, calling fetch_fn when missing or expired
+
+        Expired entries are kept until evicted so they can be served if the
+        refresh fails (e.g. network error or provider rate limit). Cached
+        values are shared between callers and must be treated as read-only.
+        Concurrent misses for the same key trigger a single fetch_fn call.
+
+        Args:
+            key: Cache key, e.g. 'av:ts_daily:SPY:compact'
+            ttl: Seconds the fetched value stays fresh
+            fetch_fn: Zero-argument callable producing the value
+
+        Returns:
+            Cached or freshly fetched value
+        """
+        entry = self._lookup(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+
+        with fetch_lock:
+            # Another thread may have refreshed the entry while we waited
+            entry = self._lookup(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+
+            try:
+                value = fetch_fn()
+            except Exception as e:
+                if entry is None:
+                    raise
+                logger.warning(f"Serving stale cache entry for {key}: {e}")
+                return entry[1]
+            finally:
+                with self._lock:
+                    self._fetch_locks.pop(key, None)
+
+            with self._lock:
+                self._entries[key] = (time.monotonic() + ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+        return value
+
+    def _lookup(self, key: str):
+        """Return the (expires_at, value) entry for key and mark it recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by all clients in the process unless one is given its own cache
+default_cache = ResponseCache()
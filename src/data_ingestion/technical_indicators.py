@@ -2,15 +2,23 @@
 
 import pandas as pd
 import numpy as np
-from typing import Optional
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, Optional
+from joblib import Parallel, delayed
 import logging
+import threading
+
+try:
+    import bottleneck as bn
+except ImportError:  # pragma: no cover - optional accelerator
+    bn = None
 
 logger = logging.getLogger(__name__)
 
 
 def calculate_rsi(prices: pd.Series, period: int = 14) -> pd.Series:
     """
-    Calculate Relative Strength Index (RSI)
+    Calculate Relative Strength Index (RSI) with Wilder's smoothing
     
     Args:
         prices: Series of closing prices
@@ -20,8 +28,11 @@ def calculate_rsi(prices: pd.Series, period: int = 14) -> pd.Series:
         Series with RSI values
     """
     delta = prices.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    
+    # Wilder's recursive average: avg = (prev * (n - 1) + x) / n
+    smoothing = {"alpha": 1 / period, "adjust": False, "min_periods": period}
+    gain = delta.clip(lower=0).ewm(**smoothing).mean()
+    loss = (-delta).clip(lower=0).ewm(**smoothing).mean()
     
     rs = gain / loss
     rsi = 100 - (100 / (1 + rs))
@@ -68,11 +79,18 @@ def calculate_price_position(df: pd.DataFrame, period: int = 30) -> pd.Series:
     Returns:
         Series with position values (0 = bottom, 100 = top)
     """
-    high_max = df["high"].rolling(window=period).max()
-    low_min = df["low"].rolling(window=period).min()
+    if bn is not None:
+        # O(N) streaming max/min in C, without the rolling() dispatch
+        high_max = bn.move_max(df["high"].to_numpy(dtype=np.float64), window=period, min_count=period)
+        low_min = bn.move_min(df["low"].to_numpy(dtype=np.float64), window=period, min_count=period)
+    else:
+        high_max = df["high"].rolling(window=period).max().to_numpy(dtype=np.float64)
+        low_min = df["low"].rolling(window=period).min().to_numpy(dtype=np.float64)
     
-    position = ((df["close"] - low_min) / (high_max - low_min)) * 100
-    return position
+    close = df["close"].to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        position = (close - low_min) / (high_max - low_min) * 100
+    return pd.Series(position, index=df.index)
 
 
 def calculate_returns(prices: pd.Series) -> pd.Series:
@@ -88,11 +106,154 @@ def calculate_returns(prices: pd.Series) -> pd.Series:
     return prices.pct_change()
 
 
+def reduce_memory(df: pd.DataFrame, category_ratio: float = 0.5) -> pd.DataFrame:
+    """
+    Shrink a DataFrame to the smallest dtypes that hold its values
+    
+    Args:
+        df: DataFrame to shrink
+        category_ratio: Maximum unique/rows ratio for converting strings to category
+    
+    Returns:
+        DataFrame with float32 floats, minimal integers and categorical strings
+    """
+    df = df.copy()
+    
+    for col in df.columns:
+        series = df[col]
+        
+        if pd.api.types.is_float_dtype(series):
+            df[col] = series.astype("float32")
+        elif pd.api.types.is_integer_dtype(series) and len(series):
+            col_min, col_max = series.min(), series.max()
+            for dtype in (np.int8, np.int16, np.int32, np.int64):
+                info = np.iinfo(dtype)
+                if info.min <= col_min and col_max <= info.max:
+                    df[col] = series.astype(dtype)
+                    break
+        elif (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)) and len(series):
+            if series.nunique() / len(series) <= category_ratio:
+                df[col] = series.astype("category")
+    
+    return df
+
+
+def _downcast_floats(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast float64 columns to float32 in place"""
+    for col in df.select_dtypes("float64").columns:
+        df[col] = df[col].astype("float32")
+    return df
+
+
+class IndicatorBuffers:
+    """
+    Reusable scratch arrays for the indicator pipeline
+    
+    Arrays grow to the longest history seen and are then reused, so repeated
+    calls do not allocate intermediates. Not thread-safe: use one per thread.
+    """
+    
+    def __init__(self):
+        self._arrays = {}
+    
+    def get(self, name: str, n: int, dtype=np.float64) -> np.ndarray:
+        """Return a length-n view of the named scratch array"""
+        arr = self._arrays.get(name)
+        if arr is None or len(arr) < n:
+            arr = np.empty(n, dtype=dtype)
+            self._arrays[name] = arr
+        return arr[:n]
+
+
+_local = threading.local()
+
+
+def _thread_buffers() -> IndicatorBuffers:
+    """Scratch buffers owned by the calling thread"""
+    buffers = getattr(_local, "buffers", None)
+    if buffers is None:
+        buffers = _local.buffers = IndicatorBuffers()
+    return buffers
+
+
+def _rolling_sum(values: np.ndarray, window: int, buffers: IndicatorBuffers) -> np.ndarray:
+    """
+    Rolling window sums taken from a single cumulative sum
+    
+    Args:
+        values: float64 array, may contain NaN
+        window: Window length
+        buffers: Scratch space for the cumulative sums
+    
+    Returns:
+        New array of window sums (the only allocation: it becomes a DataFrame
+        column), NaN until the window fills or while it holds a NaN
+    """
+    n = len(values)
+    out = np.empty(n)
+    out[:window - 1] = np.nan
+    if n < window:
+        return out
+    
+    nan_mask = np.isnan(values, out=buffers.get("nan_mask", n, dtype=bool))
+    clean = buffers.get("clean", n)
+    np.copyto(clean, values)
+    clean[nan_mask] = 0.0
+    
+    csum = buffers.get("csum", n + 1)
+    csum[0] = 0.0
+    np.cumsum(clean, out=csum[1:])
+    cnan = buffers.get("cnan", n + 1, dtype=np.int64)
+    cnan[0] = 0
+    np.cumsum(nan_mask, out=cnan[1:])
+    
+    np.subtract(csum[window:], csum[:-window], out=out[window - 1:])
+    out[window - 1:][cnan[window:] > cnan[:-window]] = np.nan
+    return out
+
+
+def _rolling_std(values: np.ndarray, window: int, buffers: IndicatorBuffers) -> np.ndarray:
+    """
+    Rolling sample standard deviation
+    
+    Each window is centered on its own mean before squaring (two-pass),
+    which avoids the cancellation of the E[x^2] - E[x]^2 form on long or
+    high-priced series. The deviations live in a reused scratch buffer, so
+    the output is the only new array.
+    
+    Args:
+        values: float64 array, may contain NaN
+        window: Window length
+        buffers: Scratch space reused across calls
+    
+    Returns:
+        New array of standard deviations, NaN until the window fills or
+        while it holds a NaN
+    """
+    n = len(values)
+    out = np.empty(n)
+    out[:window - 1] = np.nan
+    if n < window:
+        return out
+    
+    full = out[window - 1:]
+    windows = sliding_window_view(values, window)
+    windows.mean(axis=1, out=full)
+    deviations = buffers.get("deviations", windows.size).reshape(windows.shape)
+    np.subtract(windows, full[:, None], out=deviations)
+    np.square(deviations, out=deviations)
+    deviations.sum(axis=1, out=full)
+    full /= window - 1
+    np.sqrt(full, out=full)
+    return out
+
+
 def enrich_with_indicators(
     df: pd.DataFrame,
     rsi_period: int = 14,
     sma_short: int = 10,
-    sma_long: int = 20
+    sma_long: int = 20,
+    buffers: Optional[IndicatorBuffers] = None
 ) -> pd.DataFrame:
     """
     Enrich DataFrame with technical indicators
@@ -102,28 +263,42 @@ def enrich_with_indicators(
         rsi_period: Period for RSI calculation
         sma_short: Period for short SMA
         sma_long: Period for long SMA
+        buffers: Scratch buffers to reuse (defaults to the calling thread's)
     
     Returns:
         Enriched DataFrame
     """
-    df = df.copy()
+    buffers = buffers or _thread_buffers()
+    # float32 halves memory and bandwidth for the rolling windows below
+    df = _downcast_floats(df.copy())
     
     # Use 'price' if available, otherwise 'close'
     price_col = "price" if "price" in df.columns else "close"
     prices = df[price_col]
     
+    # Work on one float64 buffer so returns, SMAs and volatility share the
+    # same cumulative sums instead of separate rolling passes
+    values = prices.to_numpy(dtype=np.float64)
+    
     # Calculate returns
-    df["returns"] = calculate_returns(prices)
+    returns = np.full(len(values), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = values[1:] / values[:-1] - 1
+    df["returns"] = returns
     
     # Calculate RSI
     df["rsi"] = calculate_rsi(prices, period=rsi_period)
     
     # Calculate SMAs
-    df[f"sma_{sma_short}"] = calculate_sma(prices, period=sma_short)
-    df[f"sma_{sma_long}"] = calculate_sma(prices, period=sma_long)
+    for period in (sma_short, sma_long):
+        sma = _rolling_sum(values, period, buffers)
+        sma /= period
+        df[f"sma_{period}"] = sma
     
-    # Calculate volatility
-    df["volatility"] = calculate_volatility(df["returns"])
+    # Calculate volatility (annualized, 30-day window)
+    volatility = _rolling_std(returns, 30, buffers)
+    volatility *= np.sqrt(252)
+    df["volatility"] = volatility
     
     # Calculate price position if we have high/low data
     if all(col in df.columns for col in ["high", "low", "close"]):
@@ -137,7 +312,104 @@ def enrich_with_indicators(
     
     # Clean up NaN values
     df = df.dropna(subset=["rsi", f"sma_{sma_short}", f"sma_{sma_long}"])
+    df = _downcast_floats(df)
     
     logger.info(f"Enriched DataFrame with technical indicators. Shape: {df.shape}")
     return df
 
+
+def _wilder_last(values: np.ndarray, period: int) -> float:
+    """Last value of Wilder's recursive average, as one weighted sum"""
+    alpha = 1 / period
+    # avg_T = (1 - a)^T * x_0 + sum_t a * (1 - a)^(T - t) * x_t
+    weights = alpha * (1 - alpha) ** np.arange(len(values) - 1, -1, -1, dtype=np.float64)
+    weights[0] /= alpha
+    return float(weights @ values)
+
+
+def enrich_last_row(
+    df: pd.DataFrame,
+    rsi_period: int = 14,
+    sma_short: int = 10,
+    sma_long: int = 20
+) -> Dict[str, float]:
+    """
+    Compute only the latest indicator values
+    
+    Equivalent to the last row of enrich_with_indicators, for callers that
+    need current values rather than the whole indicator history.
+    
+    Args:
+        df: DataFrame with 'price' or 'close' column
+        rsi_period: Period for RSI calculation
+        sma_short: Period for short SMA
+        sma_long: Period for long SMA
+    
+    Returns:
+        Dictionary with price, returns, rsi, SMAs, volatility, price_position
+        and data_points (rows enrich_with_indicators would keep)
+    
+    Raises:
+        ValueError: If there is not enough history for RSI and the long SMA
+    """
+    price_col = "price" if "price" in df.columns else "close"
+    # Same float32 inputs as the full pipeline
+    values = df[price_col].to_numpy(dtype=np.float32).astype(np.float64)
+    n = len(values)
+    
+    data_points = n - max(rsi_period, sma_long - 1)
+    if data_points <= 0:
+        raise ValueError(f"Need more than {max(rsi_period, sma_long - 1)} rows for indicators, got {n}")
+    
+    delta = np.diff(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = _wilder_last(np.clip(delta, 0, None), rsi_period) / _wilder_last(np.clip(-delta, 0, None), rsi_period)
+        rsi = 100 - 100 / (1 + rs)
+        
+        returns = values[-31:][1:] / values[-31:][:-1] - 1
+        volatility = returns.std(ddof=1) * np.sqrt(252) if len(returns) == 30 else np.nan
+    
+    if all(col in df.columns for col in ["high", "low", "close"]):
+        high = df["high"].to_numpy(dtype=np.float32)[-30:].astype(np.float64)
+        low = df["low"].to_numpy(dtype=np.float32)[-30:].astype(np.float64)
+        close = float(np.float32(df["close"].iat[-1]))
+    else:
+        high = low = values[-30:]
+        close = values[-1]
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_position = (close - low.min()) / (high.max() - low.min()) * 100 if n >= 30 else np.nan
+    
+    return {
+        "price": float(values[-1]),
+        "returns": float(returns[-1]),
+        "rsi": float(rsi),
+        f"sma_{sma_short}": float(values[-sma_short:].mean()),
+        f"sma_{sma_long}": float(values[-sma_long:].mean()),
+        "volatility": float(volatility),
+        "price_position": float(price_position),
+        "data_points": data_points
+    }
+
+
+def enrich_many(dfs: List[pd.DataFrame], max_workers: int = 8, **kwargs) -> List[pd.DataFrame]:
+    """
+    Enrich several DataFrames in parallel threads
+    
+    The rolling kernels run in numpy/pandas C code that releases the GIL, so
+    threads scale without pickling the frames to worker processes.
+    
+    Args:
+        dfs: DataFrames to enrich
+        max_workers: Maximum number of threads
+        **kwargs: Passed through to enrich_with_indicators
+    
+    Returns:
+        Enriched DataFrames in input order
+    """
+    if len(dfs) <= 1:
+        return [enrich_with_indicators(df, **kwargs) for df in dfs]
+    
+    return Parallel(n_jobs=min(max_workers, len(dfs)), backend="threading")(
+        delayed(enrich_with_indicators)(df, **kwargs) for df in dfs
+    )
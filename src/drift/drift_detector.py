@@ -2,11 +2,11 @@
 Drift Detection Module
 """
 import numpy as np
-import pandas as pd
 from scipy import stats
-from typing import Dict, Any, List, Optional
+from collections import Counter, deque
+from typing import Deque, Dict, Any, List, Optional
 import logging
-import json
+import orjson
 import os
 
 logger = logging.getLogger(__name__)
@@ -14,39 +14,102 @@ logger = logging.getLogger(__name__)
 class DriftDetector:
     """Detects drift in model predictions and agent actions"""
     
-    def __init__(self, reference_data_path: str = "./data/drift_reference.json"):
+    # Size of the sliding reference window
+    WINDOW = 1000
+    
+    def __init__(self, reference_data_path: str = "./data/drift_reference.json", save_every: int = 20):
         self.reference_data_path = reference_data_path
-        self.reference_data = self._load_reference_data()
+        self.save_every = save_every
+        self._pending = 0
+        
+        # Predictions live in a fixed ring buffer, actions in a bounded deque
+        self._preds = np.empty(self.WINDOW, dtype=np.float32)
+        self._n = 0
+        self._pos = 0
+        self._actions: Deque[str] = deque(maxlen=self.WINDOW)
+        self._sorted_preds: Optional[np.ndarray] = None
+        
+        data = self._load_reference_data()
+        for prediction in data.get("predictions", [])[-self.WINDOW:]:
+            self._push_prediction(prediction)
+        self._actions.extend(data.get("actions", [])[-self.WINDOW:])
+        self._action_counts = Counter(self._actions)
         
     def _load_reference_data(self) -> Dict[str, Any]:
         """Load reference distributions"""
         if os.path.exists(self.reference_data_path):
             try:
-                with open(self.reference_data_path, 'r') as f:
-                    return json.load(f)
+                with open(self.reference_data_path, 'rb') as f:
+                    return orjson.loads(f.read())
             except Exception as e:
                 logger.error(f"Error loading drift reference: {e}")
         return {"predictions": [], "actions": []}
+    
+    def _push_prediction(self, value: float):
+        """Write one prediction into the ring buffer"""
+        self._preds[self._pos] = value
+        self._pos = (self._pos + 1) % self.WINDOW
+        self._n = min(self._n + 1, self.WINDOW)
+        self._sorted_preds = None
+    
+    def _ordered_predictions(self) -> np.ndarray:
+        """Predictions in arrival order (oldest first)"""
+        if self._n < self.WINDOW:
+            return self._preds[:self._n].copy()
+        return np.concatenate((self._preds[self._pos:], self._preds[:self._pos]))
+    
+    def _reference_sorted(self) -> np.ndarray:
+        """Sorted reference predictions, re-sorted only after the window changes"""
+        if self._sorted_preds is None:
+            self._sorted_preds = np.sort(self._preds[:self._n])
+        return self._sorted_preds
+    
+    @property
+    def reference_data(self) -> Dict[str, Any]:
+        """Snapshot of the reference window as plain lists"""
+        return {
+            "predictions": self._ordered_predictions().tolist(),
+            "actions": list(self._actions)
+        }
 
     def update_reference(self, new_prediction: float, new_action: str):
         """Update reference data (simple sliding window or append)"""
         # In a real system, we'd have a separate training set reference.
         # Here we collect data to build a baseline if empty.
-        self.reference_data["predictions"].append(new_prediction)
-        self.reference_data["actions"].append(new_action)
+        self._push_prediction(new_prediction)
         
-        # Keep window size manageable
-        if len(self.reference_data["predictions"]) > 1000:
-            self.reference_data["predictions"] = self.reference_data["predictions"][-1000:]
-            self.reference_data["actions"] = self.reference_data["actions"][-1000:]
-            
+        # Keep the action histogram in step with the window
+        if len(self._actions) == self.WINDOW:
+            evicted = self._actions[0]
+            self._action_counts[evicted] -= 1
+            if not self._action_counts[evicted]:
+                del self._action_counts[evicted]
+        self._actions.append(new_action)
+        self._action_counts[new_action] += 1
+        
+        # Persist every save_every updates instead of rewriting the file per call
+        self._pending += 1
+        if self._pending >= self.save_every:
+            self.flush()
+    
+    def flush(self):
+        """Write pending reference data to disk"""
         self._save_reference()
+        self._pending = 0
 
     def _save_reference(self):
         try:
             os.makedirs(os.path.dirname(self.reference_data_path), exist_ok=True)
-            with open(self.reference_data_path, 'w') as f:
-                json.dump(self.reference_data, f)
+            
+            # Write-then-rename so concurrent readers never see a partial file
+            tmp_path = f"{self.reference_data_path}.tmp"
+            snapshot = {
+                "predictions": self._ordered_predictions(),
+                "actions": list(self._actions)
+            }
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(snapshot, option=orjson.OPT_SERIALIZE_NUMPY))
+            os.replace(tmp_path, self.reference_data_path)
         except Exception as e:
             logger.error(f"Error saving drift reference: {e}")
 
@@ -54,11 +117,13 @@ class DriftDetector:
         """
         Detect drift in model confidence predictions using KS Test
         """
-        if len(self.reference_data["predictions"]) < 50 or len(current_predictions) < 10:
+        if self._n < 50 or len(current_predictions) < 10:
             return {"drift_detected": False, "reason": "Insufficient data"}
             
-        # Kolmogorov-Smirnov test
-        statistic, p_value = stats.ks_2samp(self.reference_data["predictions"], current_predictions)
+        # Kolmogorov-Smirnov test; window sizes here are large enough for the
+        # asymptotic distribution, which skips the exact-mode computation
+        current = np.sort(np.asarray(current_predictions, dtype=np.float32))
+        statistic, p_value = stats.ks_2samp(self._reference_sorted(), current, method="asymp")
         
         drift_detected = p_value < 0.05
         
@@ -73,18 +138,19 @@ class DriftDetector:
         """
         Detect drift in agent actions (categorical) using Chi-Square
         """
-        if len(self.reference_data["actions"]) < 50 or len(current_actions) < 10:
+        if len(self._actions) < 50 or len(current_actions) < 10:
             return {"drift_detected": False, "reason": "Insufficient data"}
             
         # simple distribution comparison
-        ref_counts = pd.Series(self.reference_data["actions"]).value_counts(normalize=True)
-        curr_counts = pd.Series(current_actions).value_counts(normalize=True)
+        ref_total = len(self._actions)
+        curr_counts = Counter(current_actions)
+        curr_total = len(current_actions)
         
         # Calculate divergence (e.g., max difference in proportions)
-        all_actions = set(ref_counts.index) | set(curr_counts.index)
+        all_actions = self._action_counts.keys() | curr_counts.keys()
         max_diff = 0
         for action in all_actions:
-            diff = abs(ref_counts.get(action, 0) - curr_counts.get(action, 0))
+            diff = abs(self._action_counts[action] / ref_total - curr_counts[action] / curr_total)
             if diff > max_diff:
                 max_diff = diff
                 
@@ -14,4 +14,5 @@ class AgentState(TypedDict):
     model_prediction: Optional[Dict[str, Any]]
     rag_context: Optional[List[Dict[str, Any]]]
     final_response: Optional[str]
+    ai_count: int
 
@@ -1,15 +1,20 @@
 """Tools for the LangGraph agent"""
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
+import asyncio
+import functools
+import hashlib
+import numpy as np
 import pandas as pd
 import logging
 from src.data_ingestion.coingecko_client import CoinGeckoClient
 from src.data_ingestion.alpha_vantage_client import AlphaVantageClient
-from src.data_ingestion.technical_indicators import enrich_with_indicators
+from src.data_ingestion.technical_indicators import enrich_with_indicators, enrich_last_row
 from src.models.random_forest_model import RandomForestStrategyModel
 from src.rag.vector_store import VectorStore
 from src.portfolio.portfolio_manager import PortfolioManager
 from src.data_ingestion.news_client import NewsClient
+from src.data_ingestion.response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +22,9 @@ logger = logging.getLogger(__name__)
 class AgentTools:
     """Collection of tools available to the agent"""
     
+    # Enriched market data is reused for repeat queries within this window
+    MARKET_DATA_TTL = 5 * 60
+    
     def __init__(
         self,
         coingecko_client: CoinGeckoClient,
@@ -32,64 +40,44 @@ class AgentTools:
         self.rf_model = rf_model
         self.portfolio_manager = portfolio_manager
         self.news_client = news_client
+        self._market_cache = ResponseCache(maxsize=256)
+        # Daily bars rarely change between requests, so identical feature rows
+        # reuse the previous forest evaluation (keyed on the model version too)
+        self._predict_cached = functools.lru_cache(maxsize=1024)(self._predict_row)
+    
+    @property
+    def rf_model(self) -> RandomForestStrategyModel:
+        """Strategy model used by predict_strategy"""
+        return self._rf_model
+    
+    @rf_model.setter
+    def rf_model(self, model: RandomForestStrategyModel):
+        # Cached predictions belong to the previous model
+        self._rf_model = model
+        if hasattr(self, "_predict_cached"):
+            self._predict_cached.cache_clear()
     
-    def get_market_data(self, symbol: str, days: int = 30) -> Dict[str, Any]:
+    def get_market_data(self, symbol: str, days: int = 30, full: bool = False) -> Dict[str, Any]:
         """
-        Fetch market data for a symbol
+        Fetch market data for a symbol (cached for MARKET_DATA_TTL)
         
         Args:
             symbol: Asset symbol (e.g., 'BTC', 'SPY', 'bitcoin')
             days: Number of days of historical data
+            full: Compute indicators over the whole history instead of only the last row
         
         Returns:
-            Dictionary with market data and indicators
+            Dictionary with market data and indicators (scalars only, so it
+            stays small and JSON-serializable for the agent state)
         """
         try:
-            # Determine if it's a crypto or ETF
-            symbol_lower = symbol.lower()
-            is_crypto = symbol_lower in ["bitcoin", "btc", "ethereum", "eth"]
-            
-            if is_crypto:
-                # Map common symbols to CoinGecko IDs
-                coin_id_map = {
-                    "btc": "bitcoin",
-                    "bitcoin": "bitcoin",
-                    "eth": "ethereum",
-                    "ethereum": "ethereum"
-                }
-                coin_id = coin_id_map.get(symbol_lower, symbol_lower)
-                
-                df = self.coingecko_client.get_price_history(
-                    coin_id=coin_id,
-                    days=days
-                )
-            else:
-                # ETF/Stock via Alpha Vantage
-                df = self.alpha_vantage_client.get_time_series_daily(
-                    symbol=symbol.upper(),
-                    outputsize="compact"
-                )
-            
-            # Enrich with technical indicators
-            df = enrich_with_indicators(df)
-            
-            # Get latest values
-            latest = df.iloc[-1].to_dict()
-            
-            result = {
-                "symbol": symbol,
-                "data_points": len(df),
-                "latest_price": latest.get("price", latest.get("close", 0)),
-                "rsi": latest.get("rsi", 0),
-                "sma_10": latest.get("sma_10", 0),
-                "sma_20": latest.get("sma_20", 0),
-                "volatility": latest.get("volatility", 0),
-                "price_position": latest.get("price_position", 0),
-                "dataframe": df  # Keep for model prediction
-            }
-            
-            logger.info(f"Retrieved market data for {symbol}")
-            return result
+            result = self._market_cache.get_or_fetch(
+                f"tools:market:{symbol.lower()}:{days}:{int(full)}",
+                self.MARKET_DATA_TTL,
+                lambda: self._build_market_data(symbol, days, full)
+            )
+            # Shallow copy so callers cannot alter the cached entry
+            return dict(result)
             
         except Exception as e:
             logger.error(f"Error getting market data: {e}")
@@ -99,6 +87,83 @@ class AgentTools:
                 "data_points": 0
             }
     
+    def _build_market_data(self, symbol: str, days: int, full: bool) -> Dict[str, Any]:
+        """Fetch prices and compute the indicator summary for one symbol"""
+        # Determine if it's a crypto or ETF
+        symbol_lower = symbol.lower()
+        is_crypto = symbol_lower in ["bitcoin", "btc", "ethereum", "eth"]
+        
+        if is_crypto:
+            # Map common symbols to CoinGecko IDs
+            coin_id_map = {
+                "btc": "bitcoin",
+                "bitcoin": "bitcoin",
+                "eth": "ethereum",
+                "ethereum": "ethereum"
+            }
+            coin_id = coin_id_map.get(symbol_lower, symbol_lower)
+            
+            df = self.coingecko_client.get_price_history(
+                coin_id=coin_id,
+                days=days
+            )
+        else:
+            # ETF/Stock via Alpha Vantage
+            df = self.alpha_vantage_client.get_time_series_daily(
+                symbol=symbol.upper(),
+                outputsize="compact"
+            )
+        
+        if full:
+            # Enrich with technical indicators and read the last row
+            df = enrich_with_indicators(df)
+            idx = len(df) - 1
+            price_col = "price" if "price" in df.columns else "close"
+            
+            def column(col: str) -> float:
+                return float(df[col].iat[idx]) if col in df.columns else 0.0
+            
+            latest = {col: column(col) for col in ["rsi", "sma_10", "sma_20", "volatility", "price_position", "returns"]}
+            latest.update(price=column(price_col), data_points=len(df))
+        else:
+            # The agent only needs current values: skip the full indicator history
+            latest = enrich_last_row(df)
+        
+        result = {
+            "symbol": symbol,
+            "data_points": latest["data_points"],
+            "latest_price": latest["price"],
+            "rsi": latest["rsi"],
+            "sma_10": latest["sma_10"],
+            "sma_20": latest["sma_20"],
+            "volatility": latest["volatility"],
+            "price_position": latest["price_position"],
+            "returns": latest["returns"]
+        }
+        
+        logger.info(f"Retrieved market data for {symbol}")
+        return result
+    
+    async def get_market_data_async(self, symbol: str, days: int = 30, full: bool = False) -> Dict[str, Any]:
+        """Awaitable get_market_data; the pooled HTTP clients run in a worker thread"""
+        return await asyncio.to_thread(self.get_market_data, symbol, days, full)
+    
+    async def get_market_data_batch(self, symbols: List[str], days: int = 30) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch market data for several symbols concurrently
+        
+        Args:
+            symbols: Asset symbols
+            days: Number of days of historical data
+        
+        Returns:
+            Dictionary mapping each symbol to its get_market_data result
+        """
+        results = await asyncio.gather(
+            *(self.get_market_data_async(symbol, days) for symbol in symbols)
+        )
+        return dict(zip(symbols, results))
+    
     def get_news_sentiment(self, symbol: str, query: str = "") -> List[Dict[str, Any]]:
         """
         Search for relevant news and sentiment using RAG
@@ -114,17 +179,11 @@ class AgentTools:
             # Build search query
             search_query = f"{symbol} {query}" if query else symbol
             
-            # Search with metadata filter
-            results = self.vector_store.search(
-                query=search_query,
-                k=5,
-                filter_dict={"symbol": symbol} if symbol else None
-            )
-            
-            # Also search general financial knowledge
-            general_results = self.vector_store.search(
-                query=query or "investment strategy technical analysis",
-                k=3
+            # Symbol-filtered search plus general financial knowledge, embedded together
+            results, general_results = self.vector_store.search_batch(
+                queries=[search_query, query or "investment strategy technical analysis"],
+                ks=[5, 3],
+                filters=[{"symbol": symbol} if symbol else None, None]
             )
             
             # Combine results
@@ -137,31 +196,40 @@ class AgentTools:
             logger.error(f"Error getting news sentiment: {e}")
             return []
     
+    async def get_news_sentiment_async(self, symbol: str, query: str = "") -> List[Dict[str, Any]]:
+        """Awaitable get_news_sentiment; embedding and search run in a worker thread"""
+        return await asyncio.to_thread(self.get_news_sentiment, symbol, query)
+    
     def predict_strategy(self, market_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Predict investment strategy using Random Forest model
         
         Args:
-            market_data: Dictionary with market data (must include 'dataframe')
+            market_data: Dictionary with market data (indicator scalars from
+                get_market_data, or just a 'symbol' to fetch them for)
         
         Returns:
             Dictionary with prediction results
         """
         try:
-            df = market_data.get("dataframe")
-            if df is None or len(df) == 0:
-                return {
-                    "strategy": "UNKNOWN",
-                    "confidence": 0.0,
-                    "error": "No data available for prediction"
-                }
+            feature_columns = self.rf_model.feature_columns
+            feat = market_data
             
-            # Get latest row for prediction
-            latest_df = df.tail(1)
+            if any(col not in market_data for col in feature_columns):
+                # Agent tool calls of one step run concurrently, so fetch here
+                # rather than rely on a get_market_data call finishing first;
+                # the market cache collapses both into a single request
+                feat = self.get_market_data(str(market_data.get("symbol", "")))
+                if "error" in feat:
+                    return {
+                        "strategy": "UNKNOWN",
+                        "confidence": 0.0,
+                        "error": f"No data available for prediction: {feat['error']}"
+                    }
             
-            # Predict
-            prediction = self.rf_model.predict(latest_df)[0]
-            probabilities = self.rf_model.predict_proba(latest_df)[0]
+            # Predict straight from the scalars, no per-call DataFrame
+            row = self.rf_model.feature_row(feat)
+            prediction, probabilities = self._predict_cached(getattr(self.rf_model, "version", 0), row.tobytes())
             
             strategy = "TOP" if prediction == 1 else "BOTTOM"
             confidence = float(max(probabilities))
@@ -188,6 +256,21 @@ class AgentTools:
                 "error": str(e)
             }
 
+    def _predict_row(self, model_version: int, feat_bytes: bytes) -> Tuple[int, Tuple[float, float]]:
+        """
+        Run the model on one serialized feature row
+        
+        Args:
+            model_version: rf_model.version, so retrained or reloaded models miss the cache
+            feat_bytes: float32 feature vector in feature_columns order
+        
+        Returns:
+            Tuple of (prediction, (P(BOTTOM), P(TOP)))
+        """
+        row = np.frombuffer(feat_bytes, dtype=np.float32).reshape(1, -1)
+        prediction, probabilities = self.rf_model.predict_row(row)
+        return prediction, (float(probabilities[0]), float(probabilities[1]))
+
     def get_portfolio(self) -> Dict[str, Any]:
         """Get current portfolio summary"""
         return self.portfolio_manager.get_portfolio_summary()
@@ -211,7 +294,8 @@ class AgentTools:
             
             texts = [doc["page_content"] for doc in rag_docs]
             metadatas = [doc["metadata"] for doc in rag_docs]
-            ids = [f"{doc['metadata']['url']}-{i}" for i, doc in enumerate(rag_docs)] # Simple ID generation
+            # Stable per-URL IDs, so re-fetched articles replace their earlier copy
+            ids = [hashlib.blake2b(doc["metadata"]["url"].encode(), digest_size=8).hexdigest() for doc in rag_docs]
             
             self.vector_store.add_documents(texts, metadatas, ids)
             return f"Successfully added {len(texts)} news items to the knowledge base."
@@ -219,3 +303,6 @@ class AgentTools:
             logger.error(f"Error updating news: {e}")
             return f"Error updating news: {e}"
 
+    async def fetch_latest_news_async(self, category: str = "general") -> str:
+        """Awaitable fetch_latest_news; the feed download and embedding run in a worker thread"""
+        return await asyncio.to_thread(self.fetch_latest_news, category)
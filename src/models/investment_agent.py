@@ -1,18 +1,50 @@
 """LangGraph agent for investment analysis"""
 
-from typing import Literal, Annotated
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Final, Literal, Optional, Annotated
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
 from langchain_core.tools import tool
 from src.models.agent_state import AgentState
 from src.models.agent_tools import AgentTools
+from src.models.query_routing import is_fast_path_query
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT: Final[str] = """You are an intelligent investment assistant that analyzes financial assets.
+
+Your capabilities:
+1. get_market_data: Get market data and technical indicators (RSI, SMAs, volatility) for a symbol
+2. get_news_sentiment: Search for relevant news and sentiment analysis from knowledge base
+3. predict_strategy: Predict investment strategies (TOP for buy, BOTTOM for sell) using ML model
+4. get_portfolio: Check current portfolio holdings
+5. add_to_portfolio / remove_from_portfolio: Manage portfolio assets
+6. fetch_latest_news: Refresh news database with latest market news
+
+When a user asks about an asset:
+1. First, call get_market_data to understand current technical indicators
+2. If needed, check get_portfolio to see if user owns it
+3. Call get_news_sentiment to get relevant context
+4. Use predict_strategy with the symbol to get ML prediction
+5. Synthesize all information into a comprehensive analysis
+
+Provide clear, actionable insights combining technical analysis with market sentiment.
+Always use the tools to gather data before providing analysis."""
+
+# Tool results surfaced in the analyze() response, by tool name
+STRUCTURED_RESULTS = {
+    "get_market_data": "market_data",
+    "predict_strategy": "model_prediction",
+    "get_news_sentiment": "rag_context"
+}
+
+SUMMARY_PROMPT = """You are an investment assistant. Using the technical indicators and ML model
+prediction provided, give a concise, actionable analysis of the asset: current trend,
+momentum (RSI), moving averages, volatility, and what the model's TOP/BOTTOM prediction implies."""
+
 
 class InvestmentAgent:
     """LangGraph agent for intelligent investment analysis"""
@@ -24,7 +56,14 @@ class InvestmentAgent:
     ):
         self.llm = llm
         self.tools = tools
+        self._system_msg = SystemMessage(content=SYSTEM_PROMPT)
         self.tools_list = self._create_tools()
+        self.tools_by_name = {t.name: t for t in self.tools_list}
+        # Independent tool calls from one LLM step run side by side
+        self._tool_executor = ThreadPoolExecutor(
+            max_workers=len(self.tools_list),
+            thread_name_prefix="agent-tool"
+        )
         self.llm_with_tools = llm.bind_tools(self.tools_list)
         self.graph = self._build_graph()
     
@@ -43,9 +82,9 @@ class InvestmentAgent:
             return tools_instance.get_news_sentiment(symbol, query)
         
         @tool
-        def predict_strategy(market_data: dict) -> dict:
-            """Predict investment strategy (TOP for buy, BOTTOM for sell) using ML model. Requires market_data dict."""
-            return tools_instance.predict_strategy(market_data)
+        def predict_strategy(symbol: str) -> dict:
+            """Predict investment strategy (TOP for buy, BOTTOM for sell) using ML model."""
+            return tools_instance.predict_strategy({"symbol": symbol})
 
         @tool
         def get_portfolio() -> dict:
@@ -72,15 +111,12 @@ class InvestmentAgent:
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph state graph"""
         
-        # Create tool node
-        tool_node = ToolNode(self.tools_list)
-        
         # Build graph
         workflow = StateGraph(AgentState)
         
         # Add nodes
         workflow.add_node("supervisor", self._supervisor_node)
-        workflow.add_node("tools", tool_node)
+        workflow.add_node("tools", self._tool_node)
         
         # Set entry point
         workflow.set_entry_point("supervisor")
@@ -99,36 +135,65 @@ class InvestmentAgent:
         
         return workflow.compile()
     
+    def _tool_node(self, state: AgentState) -> Dict[str, Any]:
+        """Execute the tool calls of the last AI message concurrently"""
+        messages = state.get("messages", [])
+        tool_calls = messages[-1].tool_calls
+        
+        # Network-bound tools (market data, news, vector search) overlap, so
+        # the step costs the slowest call instead of the sum
+        if len(tool_calls) == 1:
+            results = [self._run_tool(tool_calls[0])]
+        else:
+            results = list(self._tool_executor.map(self._run_tool, tool_calls))
+        
+        return {"messages": messages + results}
+    
+    def _run_tool(self, tool_call: Dict[str, Any]) -> ToolMessage:
+        """
+        Invoke one tool call and wrap its output in a ToolMessage
+        
+        The serialized output goes to the LLM as content; the original object
+        is kept as the message artifact so analyze() can read it back as is.
+        """
+        name = tool_call["name"]
+        selected = self.tools_by_name.get(name)
+        if selected is None:
+            return ToolMessage(
+                content=f"Error: {name} is not a valid tool",
+                name=name,
+                tool_call_id=tool_call["id"],
+                status="error"
+            )
+        
+        try:
+            output = selected.invoke(tool_call["args"])
+        except Exception as e:
+            logger.error(f"Error running tool {name}: {e}")
+            return ToolMessage(
+                content=f"Error: {e!r}\n Please fix your mistakes.",
+                name=name,
+                tool_call_id=tool_call["id"],
+                status="error"
+            )
+        
+        if isinstance(output, str):
+            content = output
+        else:
+            try:
+                content = json.dumps(output, ensure_ascii=False)
+            except Exception:
+                content = str(output)
+        
+        return ToolMessage(content=content, name=name, tool_call_id=tool_call["id"], artifact=output)
+    
     def _supervisor_node(self, state: AgentState) -> AgentState:
         """Supervisor node that decides what to do next"""
         try:
             messages = state.get("messages", [])
             
-            # Build system prompt
-            system_prompt = """You are an intelligent investment assistant that analyzes financial assets.
-
-Your capabilities:
-1. get_market_data: Get market data and technical indicators (RSI, SMAs, volatility) for a symbol
-2. get_news_sentiment: Search for relevant news and sentiment analysis from knowledge base
-3. predict_strategy: Predict investment strategies (TOP for buy, BOTTOM for sell) using ML model
-4. get_portfolio: Check current portfolio holdings
-5. add_to_portfolio / remove_from_portfolio: Manage portfolio assets
-6. fetch_latest_news: Refresh news database with latest market news
-
-When a user asks about an asset:
-1. First, call get_market_data to understand current technical indicators
-2. If needed, check get_portfolio to see if user owns it
-3. Call get_news_sentiment to get relevant context
-4. Use predict_strategy with the market_data to get ML prediction
-5. Synthesize all information into a comprehensive analysis
-
-Provide clear, actionable insights combining technical analysis with market sentiment.
-Always use the tools to gather data before providing analysis."""
-            
-            # Prepare messages for LLM (add system message if not present)
-            llm_messages = messages
-            if not any(isinstance(m, SystemMessage) for m in messages):
-                llm_messages = [SystemMessage(content=system_prompt)] + messages
+            # The system message is never stored in state, so prepend it every turn
+            llm_messages = [self._system_msg] + messages
             
             # Get response from LLM with tools
             response = self.llm_with_tools.invoke(llm_messages)
@@ -144,6 +209,7 @@ Always use the tools to gather data before providing analysis."""
             
             # Update state
             state["messages"] = messages + [response]
+            state["ai_count"] = state.get("ai_count", 0) + 1
             
             return state
             
@@ -151,105 +217,175 @@ Always use the tools to gather data before providing analysis."""
             logger.error(f"Error in supervisor node: {e}")
             error_message = AIMessage(content=f"Error: {str(e)}")
             state["messages"] = state.get("messages", []) + [error_message]
+            state["ai_count"] = state.get("ai_count", 0) + 1
             return state
     
     def _should_continue(self, state: AgentState) -> Literal["continue", "end"]:
         """Decide whether to continue or end"""
+        # Prevent infinite loops: max 10 AI responses, counted by the supervisor
+        if state.get("ai_count", 0) > 10:
+            return "end"
+        
+        # Continue to execute tools if the last response requested any
         messages = state.get("messages", [])
         last_message = messages[-1] if messages else None
-        
-        # Check if we have tool calls - continue to execute tools
-        if last_message and hasattr(last_message, "tool_calls") and last_message.tool_calls:
+        if last_message is not None and getattr(last_message, "tool_calls", None):
             return "continue"
         
-        # Check if we have enough iterations (prevent infinite loops)
-        ai_messages = [m for m in messages if isinstance(m, AIMessage)]
-        if len(ai_messages) > 10:  # Max 10 AI responses
-            return "end"
-        
-        # End if we have a final response without tool calls
-        if last_message and isinstance(last_message, AIMessage):
-            if not hasattr(last_message, "tool_calls") or not last_message.tool_calls:
-                return "end"
-        
-        # Default: end if no tool calls
+        # End on a final response without tool calls
         return "end"
     
-    def analyze(self, symbol: str, query: str) -> dict:
+    def analyze(self, symbol: str, query: str, force_full: bool = False) -> dict:
         """
         Analyze an asset and provide investment recommendation
         
         Args:
             symbol: Asset symbol
             query: User query about the asset
+            force_full: Always run the full LangGraph loop, even for bare
+                "analyze <symbol>" style queries
         
         Returns:
             Dictionary with analysis results
         """
+        # Plain single-asset questions follow a fixed tool sequence and skip the graph
+        if not force_full and is_fast_path_query(query, symbol):
+            result = self._fast_analyze(symbol, query)
+            if result is not None:
+                return result
+        
         try:
-            # Initialize state
-            initial_state: AgentState = {
-                "messages": [HumanMessage(content=f"Analyze {symbol}. {query}")],
-                "user_query": query,
-                "symbol": symbol,
-                "market_data": None,
-                "news_data": None,
-                "model_prediction": None,
-                "rag_context": None,
-                "final_response": None
-            }
-            
             # Run graph
-            final_state = self.graph.invoke(initial_state)
+            final_state = self.graph.invoke(self._initial_state(symbol, query))
+            return self._build_result(symbol, query, final_state)
             
-            # Extract final response and tool results
-            messages = final_state.get("messages", [])
-            final_response = ""
-            market_data = None
-            model_prediction = None
-            rag_context = None
+        except Exception as e:
+            logger.error(f"Error in agent analysis: {e}")
+            return self._error_result(symbol, query, e)
+    
+    async def analyze_stream(self, symbol: str, query: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analyze an asset, yielding LLM output as it is generated
+        
+        Args:
+            symbol: Asset symbol
+            query: User query about the asset
+        
+        Yields:
+            {"type": "token", "content": str} for each streamed chunk, then one
+            {"type": "result", ...} with the same fields as analyze()
+        """
+        try:
+            final_state: Dict[str, Any] = {}
+            async for event in self.graph.astream_events(self._initial_state(symbol, query), version="v2"):
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    content = event["data"]["chunk"].content
+                    if content and isinstance(content, str):
+                        yield {"type": "token", "content": content}
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    # The root run ending carries the final graph state
+                    final_state = event["data"]["output"]
             
-            # Extract data from tool messages
-            for msg in messages:
-                if isinstance(msg, ToolMessage):
-                    try:
-                        result = json.loads(msg.content) if isinstance(msg.content, str) else msg.content
-                        if isinstance(result, dict):
-                            if "rsi" in result or "latest_price" in result:
-                                market_data = result
-                            elif "strategy" in result:
-                                model_prediction = result
-                            elif isinstance(result, list) and len(result) > 0:
-                                rag_context = result
-                    except:
-                        pass
+            yield {"type": "result", **self._build_result(symbol, query, final_state)}
             
-            # Get final AI response
-            for msg in reversed(messages):
-                if isinstance(msg, AIMessage) and msg.content:
-                    if not hasattr(msg, "tool_calls") or not msg.tool_calls:
-                        final_response = msg.content
-                        break
+        except Exception as e:
+            logger.error(f"Error in streamed agent analysis: {e}")
+            yield {"type": "result", **self._error_result(symbol, query, e)}
+    
+    @staticmethod
+    def _initial_state(symbol: str, query: str) -> AgentState:
+        """Graph input for one analysis request"""
+        return {
+            "messages": [HumanMessage(content=f"Analyze {symbol}. {query}")],
+            "user_query": query,
+            "symbol": symbol,
+            "market_data": None,
+            "news_data": None,
+            "model_prediction": None,
+            "rag_context": None,
+            "final_response": None,
+            "ai_count": 0
+        }
+    
+    @staticmethod
+    def _build_result(symbol: str, query: str, final_state: Dict[str, Any]) -> dict:
+        """Extract the final response and tool results from a finished graph state"""
+        messages = final_state.get("messages", [])
+        final_response = ""
+        structured: Dict[str, Any] = {}
+        
+        # Tool outputs ride along as artifacts, so no content needs re-parsing
+        for msg in messages:
+            if isinstance(msg, ToolMessage) and msg.status != "error":
+                key = STRUCTURED_RESULTS.get(msg.name)
+                if key and msg.artifact:
+                    structured[key] = msg.artifact
+        
+        # Get final AI response
+        for msg in reversed(messages):
+            if isinstance(msg, AIMessage) and msg.content:
+                if not hasattr(msg, "tool_calls") or not msg.tool_calls:
+                    final_response = msg.content
+                    break
+        
+        # If no final response, construct one from available data
+        if not final_response:
+            final_response = "Analysis completed. Check market_data and model_prediction for details."
+        
+        return {
+            "symbol": symbol,
+            "query": query,
+            "analysis": final_response,
+            "market_data": structured.get("market_data") or final_state.get("market_data"),
+            "model_prediction": structured.get("model_prediction") or final_state.get("model_prediction"),
+            "rag_context": structured.get("rag_context") or final_state.get("rag_context")
+        }
+    
+    @staticmethod
+    def _error_result(symbol: str, query: str, error: Exception) -> dict:
+        """Response payload for a failed analysis"""
+        return {
+            "symbol": symbol,
+            "query": query,
+            "error": str(error),
+            "analysis": f"Error analyzing {symbol}: {str(error)}"
+        }
+    
+    def _fast_analyze(self, symbol: str, query: str) -> Optional[dict]:
+        """
+        Answer a plain analysis question with market data, prediction and one LLM call
+        
+        Args:
+            symbol: Asset symbol
+            query: User query about the asset
+        
+        Returns:
+            Dictionary with analysis results, or None to fall back to the graph
+        """
+        try:
+            market_data = self.tools.get_market_data(symbol)
+            if "error" in market_data:
+                return None
+            model_prediction = self.tools.predict_strategy(market_data)
             
-            # If no final response, construct one from available data
-            if not final_response:
-                final_response = "Analysis completed. Check market_data and model_prediction for details."
+            context = (
+                f"Asset: {symbol}\n"
+                f"Question: {query}\n"
+                f"Market data: {json.dumps(market_data)}\n"
+                f"Model prediction: {json.dumps(model_prediction)}"
+            )
+            response = self.llm.invoke([SystemMessage(content=SUMMARY_PROMPT), HumanMessage(content=context)])
             
             return {
                 "symbol": symbol,
                 "query": query,
-                "analysis": final_response,
-                "market_data": market_data or final_state.get("market_data"),
-                "model_prediction": model_prediction or final_state.get("model_prediction"),
-                "rag_context": rag_context or final_state.get("rag_context")
+                "analysis": response.content or "Analysis completed. Check market_data and model_prediction for details.",
+                "market_data": market_data,
+                "model_prediction": model_prediction,
+                "rag_context": None
             }
             
         except Exception as e:
-            logger.error(f"Error in agent analysis: {e}")
-            return {
-                "symbol": symbol,
-                "query": query,
-                "error": str(e),
-                "analysis": f"Error analyzing {symbol}: {str(e)}"
-            }
-
+            logger.warning(f"Fast-path analysis failed for {symbol}, using full agent: {e}")
+            return None
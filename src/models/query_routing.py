@@ -0,0 +1,36 @@
+"""Routing of analyze queries between the fast path and the full agent loop"""
+
+import re
+
+# Only bare requests ("analyze BTC", "should I buy it?") take the fast path;
+# anything else ("analyze the latest news on AAPL", "should I sell given my
+# portfolio") needs the agent to pick tools such as news or portfolio lookups
+FAST_PATH_PATTERN = re.compile(
+    r"^\s*(?:please\s+)?(?:analy[sz]e|forecast|should\s+i\s+(?:buy|sell))"
+    r"(?:\s+(?P<target>\$?[\w.\-/]+))?\s*[?.!]*\s*$",
+    re.IGNORECASE,
+)
+
+
+def is_fast_path_query(query: str, symbol: str) -> bool:
+    """
+    Check whether a query is a plain single-asset analysis request
+
+    Args:
+        query: User query about the asset
+        symbol: Asset symbol the query is about
+
+    Returns:
+        True if the fixed market data -> prediction sequence answers it fully
+    """
+    if not symbol:
+        return False
+    match = FAST_PATH_PATTERN.match(query or "")
+    if match is None:
+        return False
+    target = match.group("target")
+    return target is None or target.lstrip("$").lower() in {
+        symbol.lower(),
+        "it",
+        "this",
+    }
@@ -2,14 +2,18 @@
 
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
 import joblib
 import mlflow
 import mlflow.sklearn
 import logging
-from typing import Tuple, Optional
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Tuple, Optional
 import os
 
 logger = logging.getLogger(__name__)
@@ -18,13 +22,41 @@ logger = logging.getLogger(__name__)
 class RandomForestStrategyModel:
     """Random Forest model for classifying investment strategies (TOP/BOTTOM)"""
     
-    def __init__(self, n_estimators: int = 100, random_state: int = 42):
-        self.model = RandomForestClassifier(
-            n_estimators=n_estimators,
-            random_state=random_state,
-            max_depth=10,
-            min_samples_split=5
-        )
+    def __init__(
+        self,
+        n_estimators: int = 100,
+        random_state: int = 42,
+        n_jobs: int = -1,
+        estimator: str = "hist_gradient_boosting"
+    ):
+        """
+        Args:
+            n_estimators: Number of trees (boosting iterations for hist_gradient_boosting)
+            random_state: Random seed
+            n_jobs: Parallel jobs for the random forest
+            estimator: 'hist_gradient_boosting' (default, faster scoring) or 'random_forest'
+        """
+        if estimator == "hist_gradient_boosting":
+            # Histogram-binned, shallower trees: much cheaper predict_proba
+            # and a far smaller joblib file than 100 depth-10 forest trees
+            self.model = HistGradientBoostingClassifier(
+                max_iter=n_estimators,
+                max_depth=6,
+                learning_rate=0.1,
+                early_stopping=True,
+                random_state=random_state
+            )
+        elif estimator == "random_forest":
+            self.model = RandomForestClassifier(
+                n_estimators=n_estimators,
+                random_state=random_state,
+                max_depth=10,
+                min_samples_split=5,
+                max_features="sqrt",
+                n_jobs=n_jobs
+            )
+        else:
+            raise ValueError(f"Unknown estimator: {estimator}")
         self.feature_columns = [
             "rsi",
             "sma_10",
@@ -33,8 +65,14 @@ class RandomForestStrategyModel:
             "price_position",
             "returns"
         ]
+        self._feature_tuple = tuple(self.feature_columns)
+        # Optional ONNX Runtime session used for inference when available
+        self._session = None
+        self._schema_cache: Dict[Tuple[str, ...], bool] = {}
+        # Bumped whenever the fitted model changes, so callers can key caches on it
+        self.version = 0
     
-    def prepare_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def prepare_features(self, df: pd.DataFrame) -> np.ndarray:
         """
         Prepare features for model training/prediction
         
@@ -42,22 +80,23 @@ class RandomForestStrategyModel:
             df: DataFrame with technical indicators
         
         Returns:
-            DataFrame with feature columns
+            float32 array of the feature columns, in feature_columns order
         """
+        # Check each column layout once; the same schema repeats every call
+        schema = tuple(df.columns)
+        columns_ok = self._schema_cache.get(schema)
+        if columns_ok is None:
+            columns_ok = self._schema_cache[schema] = set(self._feature_tuple) <= set(schema)
+        
         # Ensure all required columns exist
-        missing_cols = set(self.feature_columns) - set(df.columns)
-        if missing_cols:
+        if not columns_ok:
+            missing_cols = [col for col in self._feature_tuple if col not in df.columns]
             logger.warning(f"Missing columns: {missing_cols}. Filling with 0.")
-            for col in missing_cols:
-                df[col] = 0
-        
-        # Select and normalize features
-        features = df[self.feature_columns].copy()
-        
-        # Fill NaN values
-        features = features.fillna(0)
+            df = df.assign(**{col: 0 for col in missing_cols})
         
-        return features
+        # Select features and fill NaN values without an intermediate copy
+        features = df[list(self._feature_tuple)].to_numpy(dtype=np.float32)
+        return np.nan_to_num(features, copy=not features.flags.writeable)
     
     def create_labels(self, df: pd.DataFrame) -> pd.Series:
         """
@@ -73,29 +112,24 @@ class RandomForestStrategyModel:
         Returns:
             Series with labels (0 or 1)
         """
-        labels = pd.Series(0, index=df.index)
+        # Work on the raw arrays: one fused mask instead of intermediate Series
+        rsi = df["rsi"].to_numpy()
+        price = df["price"].to_numpy()
+        sma_20 = df["sma_20"].to_numpy()
         
-        # Calculate median volatility
-        median_vol = df["volatility"].median() if "volatility" in df.columns else 0
+        # TOP conditions; BOTTOM (RSI > 65, price > sma_20, high volatility)
+        # and every other row keep the default label 0
+        top_conditions = (rsi < 35) & (price < sma_20)
         
-        # TOP conditions
-        top_conditions = (
-            (df["rsi"] < 35) &
-            (df["price"] < df["sma_20"]) &
-            (df["volatility"] > median_vol)
-        )
+        # Without a volatility column the volatility condition is dropped
+        if "volatility" in df.columns:
+            volatility = df["volatility"].to_numpy()
+            # Median volatility (NaN-skipping, like Series.median)
+            median_vol = np.nanmedian(volatility) if len(volatility) else 0
+            top_conditions &= volatility > median_vol
         
-        # BOTTOM conditions
-        bottom_conditions = (
-            (df["rsi"] > 65) &
-            (df["price"] > df["sma_20"]) &
-            (df["volatility"] > median_vol)
-        )
-        
-        labels[top_conditions] = 1  # TOP
-        labels[bottom_conditions] = 0  # BOTTOM
-        
-        return labels
+        labels = top_conditions.astype(np.int8)
+        return pd.Series(labels, index=df.index)
     
     def train(
         self,
@@ -117,12 +151,9 @@ class RandomForestStrategyModel:
         try:
             # Prepare features and labels
             X = self.prepare_features(df)
-            y = self.create_labels(df)
-            
-            # Remove rows where label is ambiguous (not clearly TOP or BOTTOM)
-            valid_mask = (y == 0) | (y == 1)
-            X = X[valid_mask]
-            y = y[valid_mask]
+            # create_labels emits only 0/1, so every row is a training sample
+            # and no ambiguous-label mask (or its copies of X and y) is needed
+            y = self.create_labels(df).to_numpy()
             
             if len(X) == 0:
                 raise ValueError("No valid training samples found")
@@ -132,9 +163,11 @@ class RandomForestStrategyModel:
                 X, y, test_size=test_size, random_state=42, stratify=y
             )
             
-            # Train model
+            # Train model on plain arrays (columns in feature_columns order) so
+            # predictions can skip building a DataFrame
             logger.info(f"Training model on {len(X_train)} samples")
             self.model.fit(X_train, y_train)
+            self.version += 1
             
             # Evaluate
             y_pred = self.model.predict(X_test)
@@ -148,9 +181,8 @@ class RandomForestStrategyModel:
                 mlflow.set_experiment(mlflow_experiment)
                 with mlflow.start_run():
                     mlflow.log_params({
-                        "n_estimators": self.model.n_estimators,
-                        "max_depth": self.model.max_depth,
-                        "min_samples_split": self.model.min_samples_split
+                        "estimator": type(self.model).__name__,
+                        **self.model.get_params()
                     })
                     mlflow.log_metric("accuracy", accuracy)
                     mlflow.log_metric("precision", report.get("1", {}).get("precision", 0))
@@ -174,9 +206,11 @@ class RandomForestStrategyModel:
             Array of predictions (0=BOTTOM, 1=TOP)
         """
         try:
+            # Derived from the probabilities, so the trees (or ONNX session) run once
+            # and callers that also need predict_proba can use predict_row instead
             X = self.prepare_features(df)
-            predictions = self.model.predict(X)
-            return predictions
+            probabilities = self.predict_proba_array(X)
+            return self.model.classes_[np.argmax(probabilities, axis=1)]
         except Exception as e:
             logger.error(f"Error making predictions: {e}")
             raise
@@ -193,28 +227,238 @@ class RandomForestStrategyModel:
         """
         try:
             X = self.prepare_features(df)
-            probabilities = self.model.predict_proba(X)
+            probabilities = self.predict_proba_array(X)
             return probabilities
         except Exception as e:
             logger.error(f"Error making probability predictions: {e}")
             raise
     
-    def save(self, filepath: str):
-        """Save model to file"""
+    def feature_row(self, feat: Dict[str, Any]) -> np.ndarray:
+        """
+        Build a single (1, n_features) float32 row from scalar feature values
+        
+        Args:
+            feat: Mapping of feature name to value (missing/NaN become 0)
+        
+        Returns:
+            Feature array in feature_columns order
+        """
+        row = np.array([[feat.get(col, 0.0) or 0.0 for col in self.feature_columns]], dtype=np.float32)
+        return np.nan_to_num(row, copy=False)
+    
+    def predict_row(self, X: np.ndarray) -> Tuple[int, np.ndarray]:
+        """
+        Predict one prepared feature row with a single forest traversal
+        
+        Args:
+            X: (1, n_features) array from feature_row
+        
+        Returns:
+            Tuple of (prediction, [P(BOTTOM), P(TOP)])
+        """
+        probabilities = self.predict_proba_array(X)[0]
+        return int(self.model.classes_[np.argmax(probabilities)]), probabilities
+    
+    def predict_one(self, feat: Dict[str, Any]) -> Tuple[int, np.ndarray]:
+        """
+        Predict strategy for one set of scalar features, bypassing pandas
+        
+        Args:
+            feat: Mapping of feature name to value, e.g. a get_market_data result
+        
+        Returns:
+            Tuple of (prediction, [P(BOTTOM), P(TOP)])
+        """
+        return self.predict_row(self.feature_row(feat))
+    
+    def predict_proba_array(self, X: np.ndarray) -> np.ndarray:
+        """
+        Class probabilities for a prepared float32 feature array
+        
+        Uses the ONNX Runtime session when one was loaded, else sklearn.
+        
+        Args:
+            X: (n, n_features) float32 array
+        
+        Returns:
+            Array of probability predictions [P(BOTTOM), P(TOP)]
+        """
+        if self._session is not None:
+            return self._session.run(None, {"X": X})[1]
+        return self.model.predict_proba(X)
+    
+    def save_onnx(self, filepath: str):
+        """
+        Export the trained model to ONNX (requires skl2onnx)
+        
+        Args:
+            filepath: Destination .onnx path
+        """
+        try:
+            from skl2onnx import convert_sklearn
+            from skl2onnx.common.data_types import FloatTensorType
+            
+            onnx_model = convert_sklearn(
+                self.model,
+                initial_types=[("X", FloatTensorType([None, len(self.feature_columns)]))],
+                options={id(self.model): {"zipmap": False}}
+            )
+            os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+            with open(filepath, "wb") as f:
+                f.write(onnx_model.SerializeToString())
+            logger.info(f"ONNX model saved to {filepath}")
+        except Exception as e:
+            logger.error(f"Error exporting ONNX model: {e}")
+            raise
+    
+    def _load_onnx(self, filepath: str):
+        """Attach an ONNX Runtime session if an .onnx sibling of filepath exists"""
+        onnx_path = os.path.splitext(filepath)[0] + ".onnx"
+        self._session = None
+        if not os.path.exists(onnx_path):
+            return
+        
+        try:
+            import onnxruntime as ort
+            
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self._session = ort.InferenceSession(
+                onnx_path,
+                sess_options=options,
+                providers=["CPUExecutionProvider"]
+            )
+            logger.info(f"Using ONNX Runtime session from {onnx_path}")
+        except Exception as e:
+            logger.warning(f"ONNX model not used, falling back to sklearn: {e}")
+    
+    def save(self, filepath: str, compress: int = 0):
+        """
+        Save model to file
+        
+        Args:
+            filepath: Destination .joblib path
+            compress: joblib compression level; compressed files are smaller
+                but cannot be memory-mapped by load()
+        """
         try:
             os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            joblib.dump(self.model, filepath)
+            joblib.dump(self.model, filepath, compress=compress, protocol=5)
             logger.info(f"Model saved to {filepath}")
         except Exception as e:
             logger.error(f"Error saving model: {e}")
             raise
     
     def load(self, filepath: str):
-        """Load model from file"""
+        """
+        Load model from file
+        
+        Tree arrays are memory-mapped read-only, so load is near-instant and
+        workers loading the same file share its pages. The loaded model is
+        for inference; train() fits fresh estimators.
+        
+        Args:
+            filepath: Path written by save()
+        """
         try:
-            self.model = joblib.load(filepath)
+            self.model = joblib.load(filepath, mmap_mode="r")
             logger.info(f"Model loaded from {filepath}")
+            self._load_onnx(filepath)
+            self.version += 1
         except Exception as e:
             logger.error(f"Error loading model: {e}")
             raise
 
+
+class PredictionBatcher:
+    """Coalesces concurrent predict calls into a single batched predict_proba"""
+    
+    def __init__(
+        self,
+        model: RandomForestStrategyModel,
+        max_wait: float = 0.01,
+        max_batch: int = 64
+    ):
+        self.model = model
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Tuple[np.ndarray, Future]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="rf-prediction-batcher", daemon=True)
+        self._worker.start()
+    
+    @property
+    def feature_columns(self):
+        """Feature columns of the wrapped model"""
+        return self.model.feature_columns
+    
+    @property
+    def version(self) -> int:
+        """Version of the wrapped model"""
+        return self.model.version
+    
+    def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Predict strategy probabilities, batched with other in-flight requests
+        
+        Args:
+            df: DataFrame with technical indicators
+        
+        Returns:
+            Array of probability predictions [P(BOTTOM), P(TOP)]
+        """
+        return self._submit(self.model.prepare_features(df))
+    
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        """Predict strategy (0=BOTTOM, 1=TOP) from the batched probabilities"""
+        probabilities = self.predict_proba(df)
+        return self.model.model.classes_[np.argmax(probabilities, axis=1)]
+    
+    def feature_row(self, feat: Dict[str, Any]) -> np.ndarray:
+        """Build a feature row with the wrapped model"""
+        return self.model.feature_row(feat)
+    
+    def predict_row(self, X: np.ndarray) -> Tuple[int, np.ndarray]:
+        """Predict one prepared feature row through the batch queue"""
+        probabilities = self._submit(X)[0]
+        return int(self.model.model.classes_[np.argmax(probabilities)]), probabilities
+    
+    def predict_one(self, feat: Dict[str, Any]) -> Tuple[int, np.ndarray]:
+        """Predict strategy for one set of scalar features"""
+        return self.predict_row(self.feature_row(feat))
+    
+    def _submit(self, X: np.ndarray) -> np.ndarray:
+        """Queue a feature array and wait for its slice of the batch result"""
+        future: Future = Future()
+        self._queue.put((X, future))
+        return future.result()
+    
+    def _collect_batch(self):
+        """Block for one request, then gather more for up to max_wait seconds"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            try:
+                features = np.vstack([features for features, _ in batch])
+                probabilities = self.model.predict_proba_array(features)
+            except Exception as e:
+                logger.error(f"Error making batched predictions: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            offset = 0
+            for features, future in batch:
+                future.set_result(probabilities[offset:offset + len(features)])
+                offset += len(features)
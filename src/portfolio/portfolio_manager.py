@@ -1,93 +1,308 @@
 """
 Portfolio Management Module
 """
-import json
+import atexit
+import weakref
+import mmap
+import numpy as np
+import orjson
 import os
 import logging
-from typing import Dict, List, Any, Optional
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple, TypedDict
 from datetime import datetime
+from functools import cached_property
 
 logger = logging.getLogger(__name__)
 
+
+class _AssetRequired(TypedDict):
+    symbol: str
+    quantity: float
+    purchase_price: float
+    added_at: str
+
+
+class Asset(_AssetRequired, total=False):
+    """One aggregated holding as stored in the portfolio file"""
+    updated_at: str
+
+
+class Portfolio(TypedDict):
+    """On-disk portfolio schema (plain dicts, so no decode-time validation cost)"""
+    assets: List[Asset]
+    history: List[Dict[str, Any]]  # Legacy; new events go to the history log
+
+
+# Flushed by a single exit hook; weak, so instances can still be collected
+_live_managers: "weakref.WeakSet[PortfolioManager]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_managers():
+    """Write pending changes of every live PortfolioManager at interpreter exit"""
+    for manager in list(_live_managers):
+        try:
+            manager.flush()
+        except Exception as e:
+            logger.error(f"Error flushing portfolio at exit: {e}")
+
+
 class PortfolioManager:
     """Manages user investment portfolio with simple JSON persistence"""
     
-    def __init__(self, storage_path: str = "./data/portfolio.json"):
+    # The append-only history log is rotated to <log>.1 past this size
+    HISTORY_ROTATE_BYTES = 10 * 1024 * 1024
+    
+    def __init__(
+        self,
+        storage_path: str = "./data/portfolio.json",
+        max_pending: int = 20,
+        flush_interval_s: float = 2.0
+    ):
         self.storage_path = storage_path
-        self.portfolio = self._load_portfolio()
+        self.max_pending = max_pending
+        self.flush_interval_s = flush_interval_s
+        # Mutation events go to a JSON-lines log instead of the rewritten snapshot
+        self.history_path = f"{os.path.splitext(storage_path)[0]}.history.jsonl"
+        self._pending_events: List[Dict[str, Any]] = []
+        # (inode, mtime, size) of the file last loaded or saved by this instance
+        self._file_sig: Optional[Tuple[int, int, int]] = None
+        # (symbols, quantities, purchase prices) for get_total_value, rebuilt after mutations
+        self._value_arrays: Optional[Tuple[List[str], np.ndarray, np.ndarray]] = None
+        
+        # Mutations are written in batches: a change after an idle period is
+        # saved at once, bursts are saved every max_pending changes or when
+        # the timer fires, and flush() writes whatever is left
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+        _live_managers.add(self)
+    
+    @cached_property
+    def portfolio(self) -> Portfolio:
+        """Portfolio contents, read from disk on first access"""
+        return self._load_portfolio()
+    
+    @cached_property
+    def _index(self) -> Dict[str, int]:
+        """Symbol -> position in the assets list, which keeps display/serialization order"""
+        return {a["symbol"]: i for i, a in enumerate(self.portfolio["assets"])}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def close(self):
+        """Write pending changes"""
+        self.flush()
+    
+    def flush(self):
+        """Write pending changes to disk now"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending:
+                self._append_history(self._pending_events)
+                self._pending_events = []
+                self._save_portfolio()
+                self._pending = 0
+            self._last_flush = time.monotonic()
+    
+    def reload(self) -> bool:
+        """
+        Re-read the portfolio if another process has replaced the file
         
-    def _load_portfolio(self) -> Dict[str, Any]:
+        Saves are atomic renames, so readers never need a lock, and an
+        unchanged file is detected from one stat call without parsing.
+        Instances with unsaved changes keep their own state.
+        
+        Returns:
+            True if the portfolio was reloaded
+        """
+        with self._lock:
+            if self._pending or self._stat_signature() == self._file_sig:
+                return False
+            self.portfolio = self._load_portfolio()
+            self._reindex()
+            return True
+    
+    def _reindex(self):
+        """Drop the lookup structures derived from self.portfolio"""
+        self.__dict__.pop("_index", None)
+        self._value_arrays = None
+    
+    def _stat_signature(self) -> Optional[Tuple[int, int, int]]:
+        """Identity of the current portfolio file, or None if it does not exist"""
+        try:
+            st = os.stat(self.storage_path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+    
+    def _mark_dirty(self, event: Dict[str, Any]):
+        """Record one mutation and save if a batch threshold is reached"""
+        with self._lock:
+            self._pending_events.append(event)
+            self._value_arrays = None
+            self._pending += 1
+            if self._pending >= self.max_pending or time.monotonic() - self._last_flush >= self.flush_interval_s:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval_s, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        
+    def _load_portfolio(self) -> Portfolio:
         """Load portfolio from JSON file"""
         if os.path.exists(self.storage_path):
             try:
-                with open(self.storage_path, 'r') as f:
-                    return json.load(f)
+                with open(self.storage_path, 'rb') as f:
+                    st = os.fstat(f.fileno())
+                    self._file_sig = (st.st_ino, st.st_mtime_ns, st.st_size)
+                    if st.st_size == 0:
+                        return {"assets": [], "history": []}
+                    # Parse straight from the page cache, without copying the file into a bytes object
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                        portfolio = orjson.loads(view)
             except Exception as e:
                 logger.error(f"Error loading portfolio: {e}")
                 return {"assets": [], "history": []}
+            if portfolio.get("history"):
+                self._migrate_history(portfolio)
+            return portfolio
         return {"assets": [], "history": []}
+    
+    def _migrate_history(self, portfolio: Portfolio):
+        """
+        Move legacy in-file history to the history log
+        
+        Older files embed every event in the snapshot, so each load parsed the
+        whole history just to read the holdings. After this one-off rewrite the
+        snapshot holds only the assets and history is read on get_history().
+        
+        Args:
+            portfolio: Freshly loaded portfolio, updated in place
+        """
+        if os.path.exists(self.history_path) or os.path.exists(f"{self.history_path}.1"):
+            # A log already exists, so the legacy events would land after newer ones
+            return
+        self._append_history(portfolio["history"])
+        if os.path.exists(self.history_path):
+            portfolio["history"] = []
+            self._save_portfolio(portfolio)
+            logger.info(f"Moved legacy portfolio history to {self.history_path}")
         
-    def _save_portfolio(self):
+    def _save_portfolio(self, portfolio: Optional[Portfolio] = None):
         """Save portfolio to JSON file"""
         try:
             os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-            with open(self.storage_path, 'w') as f:
-                json.dump(self.portfolio, f, indent=2)
+            # Compact encoding: no indentation whitespace to write or parse back
+            payload = orjson.dumps(self.portfolio if portfolio is None else portfolio)
+            
+            # Write-then-rename so a crash mid-write never leaves a torn file
+            tmp_path = f"{self.storage_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.storage_path)
+            self._file_sig = self._stat_signature()
         except Exception as e:
             logger.error(f"Error saving portfolio: {e}")
             
-    def add_asset(self, symbol: str, quantity: float, purchase_price: float) -> Dict[str, Any]:
+    def _append_history(self, events: List[Dict[str, Any]]):
+        """Append mutation events to the history log (O(1) in the history length)"""
+        if not events:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.history_path), exist_ok=True)
+            if os.path.exists(self.history_path) and os.path.getsize(self.history_path) >= self.HISTORY_ROTATE_BYTES:
+                os.replace(self.history_path, f"{self.history_path}.1")
+            with open(self.history_path, 'ab') as f:
+                f.write(b"".join(orjson.dumps(event) + b"\n" for event in events))
+        except Exception as e:
+            logger.error(f"Error appending portfolio history: {e}")
+            
+    def add_asset(self, symbol: str, quantity: float, purchase_price: float) -> Portfolio:
         """Add an asset to the portfolio"""
-        asset = {
-            "symbol": symbol.upper(),
-            "quantity": quantity,
-            "purchase_price": purchase_price,
-            "added_at": datetime.now().isoformat()
-        }
-        
-        # Check if asset already exists, if so update quantity (avg price calculation omitted for simplicity, just adding new entry or simple append?)
-        # For simplicity, we'll just append a new lot. Or maybe aggregate?
-        # Let's aggregate by symbol for simpler display
+        sym = symbol.upper()
+        now = datetime.now().isoformat()
         
-        existing = next((a for a in self.portfolio["assets"] if a["symbol"] == symbol.upper()), None)
-        if existing:
-            # Weighted average price
-            total_cost = (existing["quantity"] * existing["purchase_price"]) + (quantity * purchase_price)
-            new_quantity = existing["quantity"] + quantity
-            existing["purchase_price"] = total_cost / new_quantity
-            existing["quantity"] = new_quantity
-            existing["updated_at"] = datetime.now().isoformat()
-        else:
-            self.portfolio["assets"].append(asset)
-            
-        self._save_portfolio()
+        # Held across the read-modify-write so a timer flush never saves a half-applied change
+        with self._lock:
+            # Aggregate lots by symbol for simpler display
+            idx = self._index.get(sym)
+            if idx is not None:
+                existing = self.portfolio["assets"][idx]
+                # Weighted average price
+                total_cost = (existing["quantity"] * existing["purchase_price"]) + (quantity * purchase_price)
+                new_quantity = existing["quantity"] + quantity
+                existing["purchase_price"] = total_cost / new_quantity
+                existing["quantity"] = new_quantity
+                existing["updated_at"] = now
+            else:
+                asset: Asset = {
+                    "symbol": sym,
+                    "quantity": quantity,
+                    "purchase_price": purchase_price,
+                    "added_at": now
+                }
+                self._index[sym] = len(self.portfolio["assets"])
+                self.portfolio["assets"].append(asset)
+                
+            self._mark_dirty({"action": "add", "symbol": sym, "quantity": quantity, "price": purchase_price, "at": now})
         logger.info(f"Added {quantity} of {symbol} to portfolio")
         return self.get_portfolio_summary()
 
-    def remove_asset(self, symbol: str, quantity: float) -> Dict[str, Any]:
+    def remove_asset(self, symbol: str, quantity: float) -> Portfolio:
         """Remove (sell) an asset"""
         symbol = symbol.upper()
-        existing = next((a for a in self.portfolio["assets"] if a["symbol"] == symbol), None)
-        
-        if not existing:
-            raise ValueError(f"Asset {symbol} not found in portfolio")
-            
-        if existing["quantity"] < quantity:
-            raise ValueError(f"Insufficient quantity of {symbol}. You have {existing['quantity']}")
+        with self._lock:
+            idx = self._index.get(symbol)
             
-        existing["quantity"] -= quantity
-        if existing["quantity"] <= 0:
-            self.portfolio["assets"].remove(existing)
+            if idx is None:
+                raise ValueError(f"Asset {symbol} not found in portfolio")
             
-        self._save_portfolio()
+            assets = self.portfolio["assets"]
+            existing = assets[idx]
+                
+            if existing["quantity"] < quantity:
+                raise ValueError(f"Insufficient quantity of {symbol}. You have {existing['quantity']}")
+                
+            existing["quantity"] -= quantity
+            if existing["quantity"] <= 0:
+                # Pop by position instead of list.remove's equality scan, then
+                # shift the positions of the assets that followed it
+                assets.pop(idx)
+                del self._index[symbol]
+                for i in range(idx, len(assets)):
+                    self._index[assets[i]["symbol"]] = i
+                
+            self._mark_dirty({"action": "remove", "symbol": symbol, "quantity": quantity, "at": datetime.now().isoformat()})
         logger.info(f"Removed {quantity} of {symbol} from portfolio")
         return self.get_portfolio_summary()
         
-    def get_portfolio_summary(self) -> Dict[str, Any]:
+    def get_portfolio_summary(self) -> Portfolio:
         """Get current portfolio summary"""
         return self.portfolio
         
-    def get_holdings(self) -> List[Dict[str, Any]]:
+    def get_history(self) -> List[Dict[str, Any]]:
+        """Get portfolio mutation events, oldest first"""
+        history = list(self.portfolio.get("history", []))
+        for path in (f"{self.history_path}.1", self.history_path):
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    history.extend(orjson.loads(line) for line in f if line.strip())
+        with self._lock:
+            return history + self._pending_events
+        
+    def get_holdings(self) -> List[Asset]:
         """Get list of assets"""
         return self.portfolio["assets"]
         
@@ -96,8 +311,19 @@ class PortfolioManager:
         Calculate total portfolio value given current prices
         current_prices: dict mapping symbol -> price
         """
-        total = 0.0
-        for asset in self.portfolio["assets"]:
-            price = current_prices.get(asset["symbol"], asset["purchase_price"]) # Fallback to purchase price if current not found
-            total += asset["quantity"] * price
-        return total
+        if self._value_arrays is None:
+            assets = self.portfolio["assets"]
+            self._value_arrays = (
+                [a["symbol"] for a in assets],
+                np.fromiter((a["quantity"] for a in assets), dtype=np.float64, count=len(assets)),
+                np.fromiter((a["purchase_price"] for a in assets), dtype=np.float64, count=len(assets))
+            )
+        symbols, quantities, purchase_prices = self._value_arrays
+        
+        # Fallback to purchase price if current not found
+        prices = np.fromiter(
+            (current_prices.get(symbol, fallback) for symbol, fallback in zip(symbols, purchase_prices)),
+            dtype=np.float64,
+            count=len(symbols)
+        )
+        return float(quantities @ prices)
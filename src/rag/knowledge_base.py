@@ -1,16 +1,32 @@
 """Financial knowledge base initialization"""
 
-from typing import List, Dict
+from dataclasses import dataclass
+from typing import List, Dict, Mapping, Tuple
 from src.rag.vector_store import VectorStore
+import numpy as np
+import hashlib
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# Embeddings of static knowledge, keyed by model + content hash
+EMBED_CACHE_PATH = "./data/embed_cache.npz"
+# Same format, written by scripts/precompute_embeddings.py; used when present
+DEFAULT_EMBEDDINGS_PATH = os.path.join(os.path.dirname(__file__), "default_embeddings.npz")
+
+
+@dataclass(slots=True, frozen=True)
+class KBEntry:
+    """One default knowledge base document"""
+    content: str
+    metadata: Mapping[str, str]
+
 
 # Financial knowledge base content
-FINANCIAL_KNOWLEDGE = [
-    {
-        "content": """
+FINANCIAL_KNOWLEDGE: Tuple[KBEntry, ...] = (
+    KBEntry(
+        content="""
         Estrategia TOP (Técnica de Oportunidad de Precio):
         Esta estrategia identifica activos que están en una posición favorable para compra.
         Indicadores clave:
@@ -19,10 +35,10 @@ FINANCIAL_KNOWLEDGE = [
         - Volatilidad alta pero con tendencia alcista
         - Sentimiento de mercado negativo pero con fundamentos sólidos
         """,
-        "metadata": {"type": "strategy", "name": "TOP", "category": "buy_signal"}
-    },
-    {
-        "content": """
+        metadata={"type": "strategy", "name": "TOP", "category": "buy_signal"}
+    ),
+    KBEntry(
+        content="""
         Estrategia BOTTOM (Técnica de Oportunidad de Precio):
         Esta estrategia identifica activos que están en una posición favorable para venta.
         Indicadores clave:
@@ -31,49 +47,128 @@ FINANCIAL_KNOWLEDGE = [
         - Volatilidad alta pero con tendencia bajista
         - Sentimiento de mercado positivo pero con sobrevaluación
         """,
-        "metadata": {"type": "strategy", "name": "BOTTOM", "category": "sell_signal"}
-    },
-    {
-        "content": """
+        metadata={"type": "strategy", "name": "BOTTOM", "category": "sell_signal"}
+    ),
+    KBEntry(
+        content="""
         RSI (Relative Strength Index):
         El RSI es un indicador técnico que mide la velocidad y magnitud de los cambios de precio.
         - RSI < 30: Indica sobreventa, posible señal de compra
         - RSI > 70: Indica sobrecompra, posible señal de venta
         - RSI entre 30-70: Rango neutral
         """,
-        "metadata": {"type": "indicator", "name": "RSI", "category": "technical_analysis"}
-    },
-    {
-        "content": """
+        metadata={"type": "indicator", "name": "RSI", "category": "technical_analysis"}
+    ),
+    KBEntry(
+        content="""
         Medias Móviles (SMA):
         Las medias móviles suavizan los datos de precio para identificar tendencias.
         - Cuando el precio cruza por encima de la SMA: Señal alcista
         - Cuando el precio cruza por debajo de la SMA: Señal bajista
         - SMA corta (10 días) vs SMA larga (20 días): Golden Cross (alcista) o Death Cross (bajista)
         """,
-        "metadata": {"type": "indicator", "name": "SMA", "category": "technical_analysis"}
-    },
-    {
-        "content": """
+        metadata={"type": "indicator", "name": "SMA", "category": "technical_analysis"}
+    ),
+    KBEntry(
+        content="""
         Análisis de Sentimiento:
         El análisis de sentimiento combina noticias y datos cualitativos con análisis técnico.
         - Sentimiento negativo + Indicadores técnicos favorables: Oportunidad de compra
         - Sentimiento positivo + Indicadores técnicos desfavorables: Señal de venta
         - El sentimiento puede preceder movimientos de precio
         """,
-        "metadata": {"type": "concept", "name": "sentiment_analysis", "category": "analysis"}
-    },
-    {
-        "content": """
+        metadata={"type": "concept", "name": "sentiment_analysis", "category": "analysis"}
+    ),
+    KBEntry(
+        content="""
         Volatilidad:
         La volatilidad mide la variabilidad de los precios.
         - Alta volatilidad: Mayor riesgo pero también mayor oportunidad
         - Baja volatilidad: Mercado estable pero con menos oportunidades
         - La volatilidad anualizada se calcula usando la desviación estándar de retornos
         """,
-        "metadata": {"type": "concept", "name": "volatility", "category": "risk_management"}
-    }
-]
+        metadata={"type": "concept", "name": "volatility", "category": "risk_management"}
+    )
+)
+
+
+def cached_embeddings(
+    vector_store: VectorStore,
+    texts: List[str],
+    cache_path: str = EMBED_CACHE_PATH
+) -> List[List[float]]:
+    """
+    Embed texts, reusing vectors cached on disk from earlier runs
+    
+    Args:
+        vector_store: VectorStore whose embedding model is used
+        texts: Document texts
+        cache_path: .npz file mapping content hashes to vectors
+    
+    Returns:
+        One embedding per text
+    """
+    hashes = [embedding_key(vector_store.embedding_model, text) for text in texts]
+    
+    # Precomputed defaults first (if generated), so they never need an API call
+    known = load_embeddings(DEFAULT_EMBEDDINGS_PATH)
+    cache = load_embeddings(cache_path)
+    known.update(cache)
+    
+    missing = [i for i, key in enumerate(hashes) if key not in known]
+    if missing:
+        vectors = vector_store.embeddings.embed_documents([texts[i] for i in missing])
+        for i, vector in zip(missing, vectors):
+            cache[hashes[i]] = known[hashes[i]] = np.asarray(vector, dtype=np.float32)
+        
+        try:
+            save_embeddings(cache_path, cache)
+        except Exception as e:
+            logger.warning(f"Could not write embedding cache {cache_path}: {e}")
+    else:
+        logger.info(f"Reused {len(texts)} cached knowledge base embeddings")
+    
+    return [known[key].tolist() for key in hashes]
+
+
+def embedding_key(embedding_model: str, text: str) -> str:
+    """Cache key for one text embedded with one model"""
+    return hashlib.sha256(f"{embedding_model}\0{text}".encode()).hexdigest()
+
+
+def load_embeddings(path: str) -> Dict[str, np.ndarray]:
+    """
+    Read an embedding cache file
+    
+    Args:
+        path: .npz file mapping embedding keys to vectors
+    
+    Returns:
+        Key -> float32 vector (empty if the file is missing or unreadable)
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with np.load(path) as data:
+            return {key: data[key] for key in data.files}
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable embedding cache {path}: {e}")
+        return {}
+
+
+def save_embeddings(path: str, vectors: Dict[str, np.ndarray]):
+    """
+    Atomically write an embedding cache file
+    
+    Args:
+        path: .npz file to write
+        vectors: Embedding key -> vector
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # np.savez appends .npz to names without it, so keep the suffix on the temp file
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, **{key: np.asarray(v, dtype=np.float32) for key, v in vectors.items()})
+    os.replace(tmp_path, path)
 
 
 def initialize_knowledge_base(vector_store: VectorStore):
@@ -88,14 +183,15 @@ def initialize_knowledge_base(vector_store: VectorStore):
         count = vector_store.collection.count()
         
         if count == 0:
-            texts = [item["content"] for item in FINANCIAL_KNOWLEDGE]
-            metadatas = [item["metadata"] for item in FINANCIAL_KNOWLEDGE]
+            texts = [entry.content for entry in FINANCIAL_KNOWLEDGE]
+            metadatas = [dict(entry.metadata) for entry in FINANCIAL_KNOWLEDGE]
             ids = [f"doc_{i}" for i in range(len(texts))]
             
             vector_store.add_documents(
                 texts=texts,
                 metadatas=metadatas,
-                ids=ids
+                ids=ids,
+                embeddings=cached_embeddings(vector_store, texts)
             )
             logger.info("Initialized knowledge base with default content")
         else:
@@ -0,0 +1,174 @@
+"""In-memory int8 quantized index for cosine similarity search"""
+
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def quantize(vectors: np.ndarray):
+    """
+    Symmetric per-vector int8 quantization
+
+    Args:
+        vectors: (n, d) float array
+
+    Returns:
+        Tuple of (int8 codes, float32 per-vector scales) with vectors ~= codes * scale
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.round(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class QuantizedIndex:
+    """
+    Flat cosine index over int8 codes with a per-vector scale
+
+    Vectors are L2-normalized before quantization, so the scaled int8 dot
+    product approximates cosine similarity at a quarter of the float32 memory.
+    Scores are returned as cosine distance (1 - similarity), like Chroma.
+    """
+
+    def __init__(self, dim: int, partition_keys: Tuple[str, ...] = ("symbol", "type")):
+        self.dim = dim
+        self.codes = np.empty((0, dim), dtype=np.int8)
+        self.scales = np.empty(0, dtype=np.float32)
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+
+        # Row lists per metadata value, so filtered searches only scan their partition
+        self.partition_keys = partition_keys
+        self._partitions: Dict[str, Dict[Any, List[int]]] = {
+            key: {} for key in partition_keys
+        }
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(
+        self,
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ):
+        """
+        Quantize and append vectors
+
+        Args:
+            embeddings: (n, dim) float embeddings
+            documents: Document texts
+            metadatas: Optional metadata dicts
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+
+        codes, scales = quantize(embeddings / norms)
+        metadatas = metadatas or [{} for _ in documents]
+
+        offset = len(self.documents)
+        for i, metadata in enumerate(metadatas, start=offset):
+            for key in self.partition_keys:
+                if key in metadata:
+                    self._partitions[key].setdefault(metadata[key], []).append(i)
+
+        self.codes = np.vstack((self.codes, codes))
+        self.scales = np.concatenate((self.scales, scales))
+        self.documents.extend(documents)
+        self.metadatas.extend(metadatas)
+
+    @staticmethod
+    def supports_filter(filter_dict: Dict[str, Any]) -> bool:
+        """True if every filter is a plain equality on a scalar value"""
+        return not any(
+            key.startswith("$") or isinstance(value, (dict, list))
+            for key, value in filter_dict.items()
+        )
+
+    def _matching_rows(
+        self, filter_dict: Optional[Dict[str, Any]]
+    ) -> Optional[np.ndarray]:
+        """Row indices whose metadata equals every filter value (None = all rows)"""
+        if not filter_dict:
+            return None
+        if not self.supports_filter(filter_dict):
+            raise ValueError(
+                f"Only scalar equality filters are supported, got {filter_dict}"
+            )
+
+        # Pre-filter on the smallest matching partition, then check the other
+        # filters on those rows only
+        candidates: Iterable[int] = range(len(self.metadatas))
+        partitions = [
+            self._partitions[key].get(value, [])
+            for key, value in filter_dict.items()
+            if key in self.partition_keys
+        ]
+        if partitions:
+            candidates = min(partitions, key=len)
+
+        return np.array(
+            [
+                i
+                for i in candidates
+                if all(
+                    self.metadatas[i].get(key) == value
+                    for key, value in filter_dict.items()
+                )
+            ],
+            dtype=np.int64,
+        )
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 5,
+        filter_dict: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Top-k cosine search
+
+        Args:
+            query: Query embedding
+            k: Number of results to return
+            filter_dict: Optional equality filters on metadata
+
+        Returns:
+            List of dictionaries with 'content', 'metadata', and 'score'
+        """
+        rows = self._matching_rows(filter_dict)
+        codes = self.codes if rows is None else self.codes[rows]
+        scales = self.scales if rows is None else self.scales[rows]
+        if len(codes) == 0:
+            return []
+
+        query = np.asarray(query, dtype=np.float32).reshape(1, -1)
+        norm = np.linalg.norm(query)
+        q_codes, q_scales = quantize(query / (norm or 1.0))
+
+        # Integer dot products, rescaled back to approximate cosine similarity
+        similarity = (
+            (codes.astype(np.int32) @ q_codes[0].astype(np.int32))
+            * scales
+            * q_scales[0]
+        )
+
+        k = min(k, len(similarity))
+        top = np.argpartition(-similarity, k - 1)[:k]
+        top = top[np.argsort(-similarity[top])]
+
+        results = []
+        for j in top:
+            i = int(j) if rows is None else int(rows[j])
+            results.append(
+                {
+                    "content": self.documents[i],
+                    "metadata": self.metadatas[i],
+                    "score": float(1.0 - similarity[j]),
+                }
+            )
+        return results
@@ -3,10 +3,17 @@
 import chromadb
 from chromadb.config import Settings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import Chroma
-from typing import List, Dict, Optional
+import numpy as np
+from typing import List, Dict, Optional, Tuple
 import logging
 import os
+import threading
+import uuid
+from functools import cached_property
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from src.rag.quantized_index import QuantizedIndex
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +21,15 @@ logger = logging.getLogger(__name__)
 class VectorStore:
     """Vector store for financial knowledge base using ChromaDB"""
     
+    # Query embeddings kept for repeated lookups (e.g. the same symbol)
+    EMBEDDING_CACHE_SIZE = 1024
+    # Formatted results of repeated searches (e.g. Streamlit reruns)
+    SEARCH_CACHE_SIZE = 256
+    
+    # Shared instances per (path, collection, model); see get_or_create()
+    _INSTANCES: Dict[Tuple[str, str, str], "VectorStore"] = {}
+    _INSTANCES_LOCK = threading.Lock()
+    
     def __init__(
         self,
         embedding_model: str = "models/embedding-001",
@@ -29,57 +45,241 @@ class VectorStore:
         if not google_api_key:
             raise ValueError("GOOGLE_AI_API_KEY environment variable is required")
         
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model=embedding_model,
-            google_api_key=google_api_key
-        )
+        self._google_api_key = google_api_key
         
-        # Initialize ChromaDB client
-        os.makedirs(chroma_db_path, exist_ok=True)
-        self.client = chromadb.PersistentClient(
-            path=chroma_db_path,
-            settings=Settings(anonymized_telemetry=False)
-        )
+        self._embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._embedding_lock = threading.Lock()
+        self._index: Optional[QuantizedIndex] = None
+        self._index_lock = threading.Lock()
+        self._search_cache: "OrderedDict[Tuple, List[Dict]]" = OrderedDict()
+        self._search_lock = threading.Lock()
         
-        # Initialize or get collection
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            metadata={"hnsw:space": "cosine"}
-        )
+        logger.info(f"Initialized VectorStore at {chroma_db_path}")
+    
+    @classmethod
+    def get_or_create(
+        cls,
+        embedding_model: str = "models/embedding-001",
+        chroma_db_path: str = "./data/chroma_db",
+        collection_name: str = "financial_knowledge"
+    ) -> "VectorStore":
+        """
+        Return the process-wide VectorStore for this configuration
         
-        # Initialize LangChain Chroma wrapper
-        self.vectorstore = Chroma(
-            client=self.client,
-            collection_name=collection_name,
-            embedding_function=self.embeddings
-        )
+        Every instance holds its own clients and caches, so callers share one
+        store per database/collection/model instead of constructing another.
         
-        logger.info(f"Initialized VectorStore at {chroma_db_path}")
+        Args:
+            embedding_model: Google AI embedding model
+            chroma_db_path: ChromaDB persistence directory
+            collection_name: Collection name
+        
+        Returns:
+            Shared VectorStore instance
+        """
+        key = (os.path.abspath(chroma_db_path), collection_name, embedding_model)
+        with cls._INSTANCES_LOCK:
+            instance = cls._INSTANCES.get(key)
+            if instance is None:
+                instance = cls._INSTANCES[key] = cls(
+                    embedding_model=embedding_model,
+                    chroma_db_path=chroma_db_path,
+                    collection_name=collection_name
+                )
+            return instance
+    
+    # Clients are created on first use, so constructing a VectorStore is cheap
+    @cached_property
+    def embeddings(self) -> GoogleGenerativeAIEmbeddings:
+        """Google AI embeddings client"""
+        return GoogleGenerativeAIEmbeddings(
+            model=self.embedding_model,
+            google_api_key=self._google_api_key
+        )
+    
+    @cached_property
+    def client(self) -> "chromadb.PersistentClient":
+        """Persistent ChromaDB client"""
+        os.makedirs(self.chroma_db_path, exist_ok=True)
+        return chromadb.PersistentClient(
+            path=self.chroma_db_path,
+            settings=Settings(anonymized_telemetry=False)
+        )
+    
+    @cached_property
+    def collection(self):
+        """Knowledge base collection, created if missing"""
+        return self.client.get_or_create_collection(
+            name=self.collection_name,
+            metadata={
+                "hnsw:space": "cosine",
+                "hnsw:construction_ef": 200,
+                "hnsw:M": 32,
+                "hnsw:search_ef": 64
+            }
+        )
     
     def add_documents(
         self,
         texts: List[str],
         metadatas: Optional[List[Dict]] = None,
-        ids: Optional[List[str]] = None
+        ids: Optional[List[str]] = None,
+        batch_size: int = 64,
+        max_concurrent_requests: int = 4,
+        embeddings: Optional[List[List[float]]] = None
     ):
         """
         Add documents to the vector store
         
+        Texts are embedded in fixed-size batches (several requests in flight
+        at once) and written with a single collection upsert.
+        
         Args:
             texts: List of text documents
             metadatas: Optional list of metadata dicts
-            ids: Optional list of document IDs
+            ids: Optional list of document IDs (re-adding an ID replaces it)
+            batch_size: Texts per embedding request
+            max_concurrent_requests: Embedding requests issued in parallel
+            embeddings: Optional precomputed vectors, one per text (skips the API)
         """
+        if not texts:
+            return
+        
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        
+        # Chroma rejects duplicate IDs within one call; keep the last occurrence
+        rows = list({doc_id: i for i, doc_id in enumerate(ids)}.values())
+        if len(rows) < len(texts):
+            texts = [texts[i] for i in rows]
+            metadatas = [metadatas[i] for i in rows] if metadatas else None
+            ids = [ids[i] for i in rows]
+            embeddings = [embeddings[i] for i in rows] if embeddings is not None else None
+        
         try:
-            self.vectorstore.add_texts(
-                texts=texts,
-                metadatas=metadatas,
-                ids=ids
+            if embeddings is None:
+                embeddings = self._embed_documents(texts, batch_size, max_concurrent_requests)
+            
+            self.collection.upsert(
+                ids=ids,
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=metadatas
             )
             logger.info(f"Added {len(texts)} documents to vector store")
         except Exception as e:
             logger.error(f"Error adding documents: {e}")
             raise
+        finally:
+            # Index and results are rebuilt from the collection on the next search
+            self._invalidate()
+    
+    def _embed_documents(self, texts: List[str], batch_size: int, max_concurrent_requests: int) -> List[List[float]]:
+        """Embed document texts in fixed-size batches, several requests at a time"""
+        batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+        if len(batches) == 1:
+            vectors = [self.embeddings.embed_documents(batches[0])]
+        else:
+            # The embedding API is network-bound, so batches overlap well in threads
+            with ThreadPoolExecutor(max_workers=min(max_concurrent_requests, len(batches))) as executor:
+                vectors = list(executor.map(self.embeddings.embed_documents, batches))
+        return [vector for batch in vectors for vector in batch]
+    
+    def _get_index(self) -> Optional[QuantizedIndex]:
+        """Int8 index over the whole collection, built on first use"""
+        with self._index_lock:
+            if self._index is None:
+                data = self.collection.get(include=["embeddings", "documents", "metadatas"])
+                embeddings = data.get("embeddings")
+                if embeddings is None or len(embeddings) == 0:
+                    return None
+                
+                embeddings = np.asarray(embeddings, dtype=np.float32)
+                index = QuantizedIndex(dim=embeddings.shape[1])
+                index.add(embeddings, data["documents"], data["metadatas"])
+                self._index = index
+                logger.info(f"Built int8 index over {len(index)} documents")
+            return self._index
+    
+    def embed_queries(self, queries: List[str]) -> List[np.ndarray]:
+        """
+        Embed query texts, reusing cached vectors for repeated queries
+        
+        Args:
+            queries: Query texts
+        
+        Returns:
+            One contiguous float32 embedding per query
+        """
+        keys = [" ".join(query.split()) for query in queries]
+        
+        with self._embedding_lock:
+            cached = {key: self._embedding_cache[key] for key in keys if key in self._embedding_cache}
+            for key in cached:
+                self._embedding_cache.move_to_end(key)
+        
+        # Embed all misses in a single call
+        missing = list(dict.fromkeys(key for key in keys if key not in cached))
+        if missing:
+            vectors = self.embeddings.embed_documents(missing, task_type="retrieval_query")
+            with self._embedding_lock:
+                for key, vector in zip(missing, vectors):
+                    # float32 arrays: a quarter of the memory of a list of floats,
+                    # and ready for the int8 index without another conversion
+                    cached[key] = self._embedding_cache[key] = np.ascontiguousarray(vector, dtype=np.float32)
+                while len(self._embedding_cache) > self.EMBEDDING_CACHE_SIZE:
+                    self._embedding_cache.popitem(last=False)
+        
+        return [cached[key] for key in keys]
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed a single query text (cached)"""
+        return self.embed_queries([query])[0]
+    
+    def search_vector(
+        self,
+        embedding: np.ndarray,
+        k: int = 5,
+        filter_dict: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Search with a precomputed query embedding
+        
+        Args:
+            embedding: Query embedding (array or list of floats)
+            k: Number of results to return
+            filter_dict: Optional metadata filters
+        
+        Returns:
+            List of dictionaries with 'content', 'metadata', and 'score'
+        """
+        # Plain equality filters are served from the int8 index; operator
+        # filters, top-level ($and, ...) or per value ({"$in": [...]}), go to Chroma
+        if not filter_dict or QuantizedIndex.supports_filter(filter_dict):
+            index = self._get_index()
+            if index is not None:
+                return index.search(embedding, k, filter_dict)
+        
+        # chromadb 0.4 only validates plain lists as embeddings
+        response = self.collection.query(
+            query_embeddings=[np.asarray(embedding, dtype=np.float32).tolist()],
+            n_results=k,
+            where=filter_dict or None,
+            include=["documents", "metadatas", "distances"]
+        )
+        return self._format_hits(response, 0, k)
+    
+    @staticmethod
+    def _format_hits(response: Dict, row: int, k: int) -> List[Dict]:
+        """Format one row of a collection.query response"""
+        hits = zip(
+            response["documents"][row],
+            response["metadatas"][row],
+            response["distances"][row]
+        )
+        return [
+            {"content": content, "metadata": metadata, "score": float(score)}
+            for content, metadata, score in hits
+        ][:k]
     
     def search(
         self,
@@ -98,40 +298,76 @@ class VectorStore:
         Returns:
             List of dictionaries with 'content', 'metadata', and 'score'
         """
+        return self.search_batch([query], [k], [filter_dict])[0]
+    
+    def search_batch(
+        self,
+        queries: List[str],
+        ks: List[int],
+        filters: Optional[List[Optional[Dict]]] = None
+    ) -> List[List[Dict]]:
+        """
+        Run several searches, embedding uncached queries in a single call
+        
+        Results of repeated searches are served from an LRU cache that is
+        cleared whenever documents are added or the collection is deleted.
+        
+        Args:
+            queries: Search queries
+            ks: Number of results to return for each query
+            filters: Optional metadata filter for each query
+        
+        Returns:
+            One result list per query, formatted like search()
+        """
+        filters = filters or [None] * len(queries)
+        
         try:
-            # Use similarity search with metadata filtering
-            if filter_dict:
-                results = self.vectorstore.similarity_search_with_score(
-                    query=query,
-                    k=k,
-                    filter=filter_dict
-                )
-            else:
-                results = self.vectorstore.similarity_search_with_score(
-                    query=query,
-                    k=k
-                )
+            keys = [self._search_key(query, k, f) for query, k, f in zip(queries, ks, filters)]
+            with self._search_lock:
+                results = [self._search_cache.get(key) for key in keys]
+                for key, hits in zip(keys, results):
+                    if hits is not None:
+                        self._search_cache.move_to_end(key)
             
-            # Format results
-            formatted_results = []
-            for doc, score in results:
-                formatted_results.append({
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "score": float(score)
-                })
+            misses = [i for i, hits in enumerate(results) if hits is None]
+            if misses:
+                embeddings = self.embed_queries([queries[i] for i in misses])
+                for i, embedding in zip(misses, embeddings):
+                    results[i] = self.search_vector(embedding, ks[i], filters[i])
+                
+                with self._search_lock:
+                    for i in misses:
+                        self._search_cache[keys[i]] = results[i]
+                    while len(self._search_cache) > self.SEARCH_CACHE_SIZE:
+                        self._search_cache.popitem(last=False)
             
-            logger.info(f"Found {len(formatted_results)} results for query")
-            return formatted_results
+            logger.info(f"Found {sum(len(r) for r in results)} results for {len(queries)} queries")
+            # Copies, so callers cannot alter cached hits
+            return [[{**hit, "metadata": dict(hit["metadata"] or {})} for hit in hits] for hits in results]
             
         except Exception as e:
             logger.error(f"Error searching vector store: {e}")
-            return []
+            return [[] for _ in queries]
+    
+    @staticmethod
+    def _search_key(query: str, k: int, filter_dict: Optional[Dict]) -> Tuple:
+        """Cache key for one search; filter values may be unhashable, so use their repr"""
+        return (" ".join(query.split()), k, repr(sorted(filter_dict.items())) if filter_dict else None)
+    
+    def _invalidate(self):
+        """Drop the int8 index and cached search results after the collection changes"""
+        self._index = None
+        with self._search_lock:
+            self._search_cache.clear()
     
     def delete_collection(self):
         """Delete the collection (use with caution)"""
         try:
             self.client.delete_collection(name=self.collection_name)
+            # A later access recreates an empty collection
+            self.__dict__.pop("collection", None)
+            self._invalidate()
             logger.info(f"Deleted collection {self.collection_name}")
         except Exception as e:
             logger.error(f"Error deleting collection: {e}")
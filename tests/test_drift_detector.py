@@ -0,0 +1,42 @@
+import pytest
+from src.drift.drift_detector import DriftDetector
+
+
+@pytest.fixture
+def reference_file(tmp_path):
+    f = tmp_path / "drift_reference.json"
+    return str(f)
+
+
+def test_reference_window_keeps_latest(reference_file):
+    dd = DriftDetector(reference_data_path=reference_file)
+    for i in range(DriftDetector.WINDOW + 200):
+        dd.update_reference(float(i), "BUY")
+
+    data = dd.reference_data
+    assert len(data["predictions"]) == DriftDetector.WINDOW
+    assert data["predictions"][0] == 200.0
+    assert data["predictions"][-1] == float(DriftDetector.WINDOW + 199)
+    assert len(data["actions"]) == DriftDetector.WINDOW
+
+
+def test_flush_persists_reference(reference_file):
+    dd = DriftDetector(reference_data_path=reference_file, save_every=100)
+    dd.update_reference(0.7, "HOLD")
+    dd.flush()
+
+    reloaded = DriftDetector(reference_data_path=reference_file)
+    assert reloaded.reference_data["predictions"] == pytest.approx([0.7])
+    assert reloaded.reference_data["actions"] == ["HOLD"]
+
+
+def test_action_counts_follow_window(reference_file):
+    dd = DriftDetector(reference_data_path=reference_file, save_every=10_000)
+    for _ in range(DriftDetector.WINDOW):
+        dd.update_reference(0.5, "SELL")
+    for _ in range(DriftDetector.WINDOW):
+        dd.update_reference(0.5, "BUY")
+
+    result = dd.detect_action_drift(["SELL"] * 20)
+    assert result["drift_detected"]
+    assert result["max_difference"] == pytest.approx(1.0)
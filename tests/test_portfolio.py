@@ -1,14 +1,19 @@
 
+import gc
 import pytest
 import os
-import json
+import orjson
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from src.portfolio.portfolio_manager import PortfolioManager
 
+
 @pytest.fixture
 def portfolio_file(tmp_path):
     f = tmp_path / "test_portfolio.json"
     return str(f)
 
+
 def test_add_asset(portfolio_file):
     pm = PortfolioManager(storage_path=portfolio_file)
     pm.add_asset("BTC", 1.0, 50000.0)
@@ -18,6 +23,7 @@ def test_add_asset(portfolio_file):
     assert summary["assets"][0]["symbol"] == "BTC"
     assert summary["assets"][0]["quantity"] == 1.0
 
+
 def test_add_existing_asset_updates_avg_price(portfolio_file):
     pm = PortfolioManager(storage_path=portfolio_file)
     pm.add_asset("BTC", 1.0, 50000.0)
@@ -28,6 +34,7 @@ def test_add_existing_asset_updates_avg_price(portfolio_file):
     assert asset["quantity"] == 2.0
     assert asset["purchase_price"] == 55000.0
 
+
 def test_remove_asset(portfolio_file):
     pm = PortfolioManager(storage_path=portfolio_file)
     pm.add_asset("ETH", 10.0, 2000.0)
@@ -36,8 +43,140 @@ def test_remove_asset(portfolio_file):
     summary = pm.get_portfolio_summary()
     assert summary["assets"][0]["quantity"] == 6.0
 
+
 def test_remove_more_than_owned_raises_error(portfolio_file):
     pm = PortfolioManager(storage_path=portfolio_file)
     pm.add_asset("ETH", 1.0, 2000.0)
     with pytest.raises(ValueError):
         pm.remove_asset("ETH", 2.0)
+
+
+def test_portfolio_persists_across_instances(portfolio_file):
+    pm = PortfolioManager(storage_path=portfolio_file)
+    pm.add_asset("BTC", 1.5, 50000.0)
+    pm.flush()
+    
+    with open(portfolio_file, "rb") as f:
+        assert orjson.loads(f.read())["assets"][0]["symbol"] == "BTC"
+    assert not os.path.exists(f"{portfolio_file}.tmp")
+    
+    reloaded = PortfolioManager(storage_path=portfolio_file)
+    assert reloaded.get_portfolio_summary() == pm.get_portfolio_summary()
+
+
+def test_burst_of_mutations_is_written_in_batches(portfolio_file, monkeypatch):
+    pm = PortfolioManager(storage_path=portfolio_file, max_pending=3, flush_interval_s=60)
+    saves = []
+    original_save = pm._save_portfolio
+    monkeypatch.setattr(pm, "_save_portfolio", lambda: (saves.append(1), original_save()))
+    
+    for _ in range(4):
+        pm.add_asset("BTC", 1.0, 50000.0)
+    assert len(saves) == 1
+    
+    pm.flush()
+    assert len(saves) == 2
+    assert PortfolioManager(storage_path=portfolio_file).get_holdings()[0]["quantity"] == 4.0
+
+
+def test_selling_whole_position_removes_asset(portfolio_file):
+    pm = PortfolioManager(storage_path=portfolio_file)
+    pm.add_asset("ETH", 2.0, 2000.0)
+    pm.remove_asset("ETH", 2.0)
+    
+    assert pm.get_holdings() == []
+    with pytest.raises(ValueError):
+        pm.remove_asset("ETH", 1.0)
+    
+    pm.add_asset("eth", 1.0, 2500.0)
+    assert pm.get_holdings()[0]["purchase_price"] == 2500.0
+
+
+def test_selling_middle_position_keeps_order_and_lookups(portfolio_file):
+    pm = PortfolioManager(storage_path=portfolio_file)
+    for symbol in ("BTC", "ETH", "SOL"):
+        pm.add_asset(symbol, 1.0, 100.0)
+    pm.remove_asset("ETH", 1.0)
+    
+    assert [a["symbol"] for a in pm.get_holdings()] == ["BTC", "SOL"]
+    pm.add_asset("SOL", 1.0, 200.0)
+    pm.remove_asset("BTC", 1.0)
+    holdings = pm.get_holdings()
+    assert [a["symbol"] for a in holdings] == ["SOL"]
+    assert holdings[0]["quantity"] == 2.0
+    assert holdings[0]["purchase_price"] == pytest.approx(150.0)
+
+
+def test_total_value_uses_current_prices_with_purchase_fallback(portfolio_file):
+    pm = PortfolioManager(storage_path=portfolio_file)
+    assert pm.get_total_value({}) == 0.0
+    
+    pm.add_asset("BTC", 2.0, 50000.0)
+    pm.add_asset("ETH", 10.0, 2000.0)
+    assert pm.get_total_value({"BTC": 60000.0}) == pytest.approx(2 * 60000.0 + 10 * 2000.0)
+    
+    pm.remove_asset("ETH", 5.0)
+    assert pm.get_total_value({"BTC": 60000.0, "ETH": 3000.0}) == pytest.approx(2 * 60000.0 + 5 * 3000.0)
+
+
+def test_reload_picks_up_changes_from_another_instance(portfolio_file):
+    writer = PortfolioManager(storage_path=portfolio_file)
+    reader = PortfolioManager(storage_path=portfolio_file)
+    assert not reader.reload()
+    
+    writer.add_asset("BTC", 1.0, 50000.0)
+    writer.flush()
+    
+    assert reader.reload()
+    assert reader.get_holdings()[0]["symbol"] == "BTC"
+    assert reader.get_total_value({"BTC": 60000.0}) == 60000.0
+    assert not reader.reload()
+
+
+def test_history_is_appended_to_a_log(portfolio_file):
+    pm = PortfolioManager(storage_path=portfolio_file)
+    pm.add_asset("btc", 1.0, 50000.0)
+    pm.remove_asset("BTC", 0.5)
+    assert [e["action"] for e in pm.get_history()] == ["add", "remove"]
+    pm.flush()
+    
+    reloaded = PortfolioManager(storage_path=portfolio_file)
+    history = reloaded.get_history()
+    assert [(e["action"], e["symbol"], e["quantity"]) for e in history] == [("add", "BTC", 1.0), ("remove", "BTC", 0.5)]
+    assert reloaded.get_portfolio_summary()["history"] == []
+
+
+def test_legacy_history_moves_out_of_the_snapshot(portfolio_file):
+    legacy = [{"action": "add", "symbol": "BTC", "quantity": 1.0, "price": 50000.0, "at": "2024-01-01T00:00:00"}]
+    asset = {"symbol": "BTC", "quantity": 1.0, "purchase_price": 50000.0, "added_at": "2024-01-01T00:00:00"}
+    with open(portfolio_file, 'wb') as f:
+        f.write(orjson.dumps({"assets": [asset], "history": legacy}))
+    
+    pm = PortfolioManager(storage_path=portfolio_file)
+    assert pm.get_holdings() == [asset]
+    with open(portfolio_file, 'rb') as f:
+        assert orjson.loads(f.read())["history"] == []
+    
+    pm.add_asset("BTC", 1.0, 50000.0)
+    pm.flush()
+    history = PortfolioManager(storage_path=portfolio_file).get_history()
+    assert len(history) == 2
+    assert history[0] == legacy[0]
+
+
+def test_concurrent_mutations_are_all_saved(portfolio_file):
+    pm = PortfolioManager(storage_path=portfolio_file, max_pending=3, flush_interval_s=0.001)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda i: pm.add_asset(f"SYM{i % 5}", 1.0, 10.0), range(200)))
+    pm.flush()
+    
+    holdings = PortfolioManager(storage_path=portfolio_file).get_holdings()
+    assert sorted((a["symbol"], a["quantity"]) for a in holdings) == [(f"SYM{i}", 40.0) for i in range(5)]
+
+
+def test_unreferenced_managers_are_collected(portfolio_file):
+    pm = PortfolioManager(storage_path=portfolio_file)
+    ref = weakref.ref(pm)
+    del pm
+    gc.collect()
+    assert ref() is None
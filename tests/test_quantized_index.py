@@ -0,0 +1,77 @@
+"""Tests for the int8 quantized vector index"""
+
+import numpy as np
+import pytest
+from src.rag.quantized_index import QuantizedIndex, quantize
+
+
+def test_quantize_round_trip():
+    vectors = np.random.default_rng(0).normal(size=(10, 32)).astype(np.float32)
+
+    codes, scales = quantize(vectors)
+
+    assert codes.dtype == np.int8
+    np.testing.assert_allclose(codes * scales[:, None], vectors, atol=scales.max())
+
+
+def test_search_matches_exact_cosine_ranking():
+    rng = np.random.default_rng(1)
+    embeddings = rng.normal(size=(200, 64)).astype(np.float32)
+    index = QuantizedIndex(dim=64)
+    index.add(embeddings, [f"doc{i}" for i in range(200)])
+
+    query = embeddings[17] + 0.01 * rng.normal(size=64)
+    results = index.search(query, k=5)
+
+    assert results[0]["content"] == "doc17"
+    assert results[0]["score"] < 0.01
+    assert [r["score"] for r in results] == sorted(r["score"] for r in results)
+
+
+def test_search_applies_metadata_filter():
+    rng = np.random.default_rng(2)
+    embeddings = rng.normal(size=(6, 8)).astype(np.float32)
+    metadatas = [{"symbol": "BTC"}, {"symbol": "SPY"}] * 3
+    index = QuantizedIndex(dim=8)
+    index.add(embeddings, [f"doc{i}" for i in range(6)], metadatas)
+
+    results = index.search(embeddings[1], k=5, filter_dict={"symbol": "BTC"})
+
+    assert len(results) == 3
+    assert all(r["metadata"]["symbol"] == "BTC" for r in results)
+
+
+def test_search_combines_partitioned_filters():
+    rng = np.random.default_rng(3)
+    embeddings = rng.normal(size=(8, 8)).astype(np.float32)
+    metadatas = [
+        {"symbol": symbol, "type": doc_type}
+        for symbol in ("BTC", "SPY")
+        for doc_type in ("news", "news", "strategy", "indicator")
+    ]
+    index = QuantizedIndex(dim=8)
+    index.add(embeddings, [f"doc{i}" for i in range(8)], metadatas)
+
+    results = index.search(
+        embeddings[0], k=5, filter_dict={"symbol": "SPY", "type": "news"}
+    )
+
+    assert sorted(r["content"] for r in results) == ["doc4", "doc5"]
+    assert index.search(embeddings[0], k=5, filter_dict={"type": "macro"}) == []
+
+
+def test_operator_filters_are_left_to_chroma():
+    assert QuantizedIndex.supports_filter({"symbol": "BTC", "type": "news"})
+    assert not QuantizedIndex.supports_filter({"symbol": {"$in": ["BTC", "ETH"]}})
+    assert not QuantizedIndex.supports_filter(
+        {"$and": [{"symbol": "BTC"}, {"type": "news"}]}
+    )
+
+    index = QuantizedIndex(dim=4)
+    index.add(
+        np.eye(4, dtype=np.float32),
+        [f"doc{i}" for i in range(4)],
+        [{"symbol": "BTC"}] * 4,
+    )
+    with pytest.raises(ValueError):
+        index.search(np.ones(4), k=2, filter_dict={"symbol": {"$in": ["BTC"]}})
@@ -0,0 +1,39 @@
+"""Tests for routing analyze queries to the fast path"""
+
+import pytest
+from src.models.query_routing import is_fast_path_query
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "analyze",
+        "Analyze BTC",
+        "analyse $btc",
+        "forecast it",
+        "Should I buy BTC?",
+        "please should i sell this",
+    ],
+)
+def test_bare_requests_take_the_fast_path(query):
+    assert is_fast_path_query(query, "BTC")
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "",
+        "analyze the latest news on BTC",
+        "should I sell given my portfolio",
+        "analyze news",
+        "analyze ETH",
+        "what is the forecast for BTC and ETH?",
+        "compare BTC with gold, should I buy?",
+    ],
+)
+def test_other_intents_run_the_full_agent(query):
+    assert not is_fast_path_query(query, "BTC")
+
+
+def test_fast_path_needs_a_symbol():
+    assert not is_fast_path_query("analyze", "")
@@ -0,0 +1,91 @@
+"""Tests for the Random Forest strategy model"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from src.models.random_forest_model import RandomForestStrategyModel, PredictionBatcher
+
+
+@pytest.fixture
+def trained_model():
+    rng = np.random.default_rng(0)
+    n = 200
+    df = pd.DataFrame(
+        {
+            "rsi": rng.uniform(0, 100, n),
+            "sma_10": rng.uniform(90, 110, n),
+            "sma_20": rng.uniform(90, 110, n),
+            "volatility": rng.uniform(0, 1, n),
+            "price_position": rng.uniform(0, 100, n),
+            "returns": rng.normal(0, 0.02, n),
+        }
+    )
+    df["price"] = df["sma_20"] + np.where(df["rsi"] < 50, -5, 5)
+
+    model = RandomForestStrategyModel(n_estimators=10)
+    X = model.prepare_features(df)
+    y = (df["rsi"] < 50).astype(int)
+    model.model.fit(X, y)
+    return model, df
+
+
+def test_prediction_batcher_matches_direct_predictions(trained_model):
+    """Batched predictions are identical to calling the model directly"""
+    model, df = trained_model
+    batcher = PredictionBatcher(model)
+    rows = [df.iloc[i : i + 1] for i in range(20)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        batched = list(executor.map(batcher.predict_proba, rows))
+
+    for row, proba in zip(rows, batched):
+        np.testing.assert_allclose(proba, model.predict_proba(row))
+    assert batcher.predict(rows[0])[0] == model.predict(rows[0])[0]
+
+
+def test_create_labels_marks_oversold_high_volatility_rows():
+    """TOP only where RSI < 35, price < sma_20 and volatility above the median"""
+    df = pd.DataFrame(
+        {
+            "rsi": [20.0, 20.0, 80.0, 20.0],
+            "price": [90.0, 110.0, 110.0, 90.0],
+            "sma_20": [100.0, 100.0, 100.0, 100.0],
+            "volatility": [0.9, 0.5, 0.5, 0.1],
+        }
+    )
+
+    labels = RandomForestStrategyModel().create_labels(df)
+
+    assert labels.tolist() == [1, 0, 0, 0]
+    assert labels.index.equals(df.index)
+
+    # Without volatility only the RSI/price conditions apply
+    assert RandomForestStrategyModel().create_labels(
+        df.drop(columns="volatility")
+    ).tolist() == [1, 0, 0, 1]
+
+
+def test_predict_one_matches_dataframe_predictions(trained_model):
+    """The scalar fast path agrees with the DataFrame path"""
+    model, df = trained_model
+    row = df.iloc[5:6]
+
+    prediction, probabilities = model.predict_one(row.iloc[0].to_dict())
+
+    assert prediction == model.predict(row)[0]
+    np.testing.assert_allclose(probabilities, model.predict_proba(row)[0], rtol=1e-6)
+
+
+def test_save_and_mmap_load_roundtrip(trained_model, tmp_path):
+    """A memory-mapped reload predicts exactly like the trained model"""
+    model, df = trained_model
+    path = str(tmp_path / "model.joblib")
+    model.save(path)
+
+    loaded = RandomForestStrategyModel()
+    loaded.load(path)
+
+    np.testing.assert_array_equal(loaded.predict_proba(df), model.predict_proba(df))
+    assert loaded.version == 1
+    assert PredictionBatcher(loaded).version == 1
@@ -0,0 +1,113 @@
+"""Tests for Alpha Vantage rate limiting"""
+
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from src.data_ingestion.alpha_vantage_client import AlphaVantageClient
+from src.data_ingestion.rate_limiter import RateLimitError, TokenBucket
+from src.data_ingestion.response_cache import ResponseCache
+
+
+def _response(payload: bytes, status_code: int = 200) -> MagicMock:
+    response = MagicMock()
+    response.content = payload
+    response.status_code = status_code
+    return response
+
+
+def test_token_bucket_throttles_after_burst():
+    """Calls beyond the bucket capacity wait for a refill"""
+    bucket = TokenBucket(rate=2, per=0.2)
+
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+
+    assert time.monotonic() - start >= 0.09
+
+
+def test_rate_limit_note_is_retried():
+    """A throttling note is retried with backoff before succeeding"""
+    client = AlphaVantageClient(
+        "key", cache=ResponseCache(), rate_limiter=TokenBucket(rate=100, per=1.0)
+    )
+    client.session.get = MagicMock(
+        side_effect=[_response(b'{"Note": "slow down"}'), _response(b'{"ok": true}')]
+    )
+
+    with patch("src.data_ingestion.alpha_vantage_client.time.sleep") as sleep:
+        assert client._request({}) == {"ok": True}
+
+    sleep.assert_called_once_with(1)
+
+
+def test_rate_limit_error_after_retries():
+    """Persistent throttling raises RateLimitError"""
+    client = AlphaVantageClient(
+        "key", cache=ResponseCache(), rate_limiter=TokenBucket(rate=100, per=1.0)
+    )
+    client.session.get = MagicMock(return_value=_response(b'{"Note": "quota"}'))
+
+    with patch("src.data_ingestion.alpha_vantage_client.time.sleep"):
+        with pytest.raises(RateLimitError):
+            client._request({})
+
+    assert client.session.get.call_count == AlphaVantageClient.MAX_RETRIES + 1
+
+
+def test_rate_limit_information_is_retried():
+    """An "Information" payload with rate-limit wording is treated as throttling"""
+    client = AlphaVantageClient(
+        "key", cache=ResponseCache(), rate_limiter=TokenBucket(rate=100, per=1.0)
+    )
+    client.session.get = MagicMock(
+        side_effect=[
+            _response(
+                b'{"Information": "Our standard API rate limit is 25 requests per day."}'
+            ),
+            _response(b'{"ok": true}'),
+        ]
+    )
+
+    with patch("src.data_ingestion.alpha_vantage_client.time.sleep") as sleep:
+        assert client._request({}) == {"ok": True}
+
+    sleep.assert_called_once_with(1)
+
+
+def test_other_information_is_not_retried():
+    """Invalid-key or premium-endpoint messages fail at once without using more quota"""
+    client = AlphaVantageClient(
+        "key", cache=ResponseCache(), rate_limiter=TokenBucket(rate=100, per=1.0)
+    )
+    client.session.get = MagicMock(
+        return_value=_response(
+            b'{"Information": "The **demo** API key is for demo purposes only."}'
+        )
+    )
+
+    with patch("src.data_ingestion.alpha_vantage_client.time.sleep") as sleep:
+        with pytest.raises(ValueError):
+            client._request({})
+
+    assert client.session.get.call_count == 1
+    sleep.assert_not_called()
+
+
+def test_http_429_is_backed_off_once():
+    """HTTP 429s are retried by the client loop only, not by urllib3 as well"""
+    client = AlphaVantageClient(
+        "key", cache=ResponseCache(), rate_limiter=TokenBucket(rate=100, per=1.0)
+    )
+    assert (
+        429 not in client.session.get_adapter("https://").max_retries.status_forcelist
+    )
+
+    client.session.get = MagicMock(
+        side_effect=[_response(b"", status_code=429), _response(b'{"ok": true}')]
+    )
+
+    with patch("src.data_ingestion.alpha_vantage_client.time.sleep") as sleep:
+        assert client._request({}) == {"ok": True}
+
+    sleep.assert_called_once_with(1)
@@ -0,0 +1,73 @@
+"""Tests for the API response cache"""
+
+import threading
+import time
+import pytest
+from src.data_ingestion.response_cache import ResponseCache
+
+
+def test_fresh_entry_is_reused():
+    cache = ResponseCache()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_fetch("k", 60, fetch) == 1
+    assert cache.get_or_fetch("k", 60, fetch) == 1
+    assert len(calls) == 1
+
+
+def test_expired_entry_is_refetched():
+    cache = ResponseCache()
+    cache.get_or_fetch("k", 0, lambda: "old")
+    assert cache.get_or_fetch("k", 60, lambda: "new") == "new"
+
+
+def test_stale_entry_served_on_error():
+    cache = ResponseCache()
+    cache.get_or_fetch("k", 0, lambda: "stale")
+
+    def failing_fetch():
+        raise ConnectionError("upstream down")
+
+    assert cache.get_or_fetch("k", 60, failing_fetch) == "stale"
+    with pytest.raises(ConnectionError):
+        cache.get_or_fetch("other", 60, failing_fetch)
+
+
+def test_lru_eviction():
+    cache = ResponseCache(maxsize=2)
+    cache.get_or_fetch("a", 60, lambda: 1)
+    cache.get_or_fetch("b", 60, lambda: 2)
+    cache.get_or_fetch("a", 60, lambda: 1)
+    cache.get_or_fetch("c", 60, lambda: 3)
+
+    assert cache.get_or_fetch("a", 60, lambda: "refetched") == 1
+    assert cache.get_or_fetch("b", 60, lambda: "refetched") == "refetched"
+
+
+def test_concurrent_misses_fetch_once():
+    cache = ResponseCache()
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_fetch("k", 60, slow_fetch))
+        )
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
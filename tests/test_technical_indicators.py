@@ -6,7 +6,13 @@ import numpy as np
 from src.data_ingestion.technical_indicators import (
     calculate_rsi,
     calculate_sma,
-    enrich_with_indicators
+    calculate_volatility,
+    enrich_with_indicators,
+    enrich_last_row,
+    enrich_many,
+    IndicatorBuffers,
+    reduce_memory,
+    _rolling_std
 )
 
 
@@ -53,4 +59,94 @@ def test_enrich_with_indicators():
     
     # Check that NaN values are handled
     assert enriched["rsi"].notna().any()  # At least some non-NaN values
+    
+    # Indicator columns are downcast to float32
+    assert enriched["rsi"].dtype == np.float32
+    assert enriched["price"].dtype == np.float32
+
+
+def test_enrich_matches_reference_indicators():
+    """Test that the fused SMA/volatility pass matches the pandas rolling versions"""
+    prices = pd.Series(100 + np.random.randn(80).cumsum())
+    
+    enriched = enrich_with_indicators(pd.DataFrame({"price": prices}))
+    returns = prices.pct_change()
+    
+    expected_sma = calculate_sma(prices, period=20).loc[enriched.index]
+    expected_vol = calculate_volatility(returns).loc[enriched.index]
+    
+    np.testing.assert_allclose(enriched["sma_20"], expected_sma, rtol=1e-5)
+    np.testing.assert_allclose(enriched["volatility"], expected_vol, rtol=1e-4)
+
+
+def test_shared_buffers_do_not_alias_results():
+    """Test that reusing scratch buffers leaves earlier results intact"""
+    buffers = IndicatorBuffers()
+    first = enrich_with_indicators(pd.DataFrame({"price": 100 + np.arange(60.0)}), buffers=buffers)
+    expected = first["sma_20"].copy()
+    
+    enrich_with_indicators(pd.DataFrame({"price": 500 - np.arange(90.0)}), buffers=buffers)
+    
+    pd.testing.assert_series_equal(first["sma_20"], expected)
+
+
+def test_rolling_std_is_stable_for_large_values():
+    """Test that a small spread on a huge level keeps its precision"""
+    rng = np.random.default_rng(0)
+    values = 1e9 + rng.normal(scale=1e-3, size=500)
+    values[100] = np.nan
+    
+    result = _rolling_std(values, 30, IndicatorBuffers())
+    
+    expected = pd.Series(values).rolling(30).apply(lambda w: np.std(w, ddof=1), raw=True).to_numpy()
+    np.testing.assert_allclose(result, expected, rtol=1e-6)
+
+
+def test_enrich_many_matches_sequential():
+    """Test that threaded enrichment returns the same frames in order"""
+    dfs = [pd.DataFrame({"price": 100 + np.random.randn(50).cumsum()}) for _ in range(4)]
+    
+    results = enrich_many(dfs)
+    
+    assert len(results) == len(dfs)
+    for df, result in zip(dfs, results):
+        pd.testing.assert_frame_equal(result, enrich_with_indicators(df))
+
+
+def test_reduce_memory():
+    """Test dtype shrinking"""
+    df = pd.DataFrame({
+        "price": np.linspace(100, 110, 10),
+        "volume": np.arange(10, dtype=np.int64) * 1000,
+        "symbol": ["SPY"] * 10
+    })
+    
+    reduced = reduce_memory(df)
+    
+    assert reduced["price"].dtype == np.float32
+    assert reduced["volume"].dtype == np.int16
+    assert isinstance(reduced["symbol"].dtype, pd.CategoricalDtype)
+    assert reduced["volume"].tolist() == df["volume"].tolist()
+
+
+@pytest.mark.parametrize("ohlc", [False, True])
+def test_enrich_last_row_matches_full_pipeline(ohlc):
+    """Latest-only indicators equal the last row of the full enrichment"""
+    rng = np.random.default_rng(7)
+    close = 100 + rng.standard_normal(120).cumsum()
+    if ohlc:
+        df = pd.DataFrame({"close": close, "high": close + 1.5, "low": close - 1.5})
+    else:
+        df = pd.DataFrame({"price": close})
+    
+    enriched = enrich_with_indicators(df)
+    last = enrich_last_row(df)
+    
+    assert last["data_points"] == len(enriched)
+    for col in ["returns", "rsi", "sma_10", "sma_20", "volatility", "price_position"]:
+        assert last[col] == pytest.approx(float(enriched[col].iat[-1]), rel=1e-5)
+
 
+def test_enrich_last_row_requires_history():
+    with pytest.raises(ValueError):
+        enrich_last_row(pd.DataFrame({"price": np.arange(10.0)}))